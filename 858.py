@@ -3,11 +3,52 @@ import json
 import yaml
 from typing import Optional, TypedDict, Any
 from langgraph.graph import StateGraph, END
+from schemavalidator import ValidationError, validator_for
+
+# --- PATTERN MATCHER ---
+class PatternMatcher:
+    """First-match dispatch of dynamic keys over patternProperties, compiled once.
+
+    Patterns are joined into one alternation with a named group per pattern.
+    re tries alternatives left to right, so the first matching pattern wins,
+    as with calling re.match on each in turn. If any pattern has groups of its
+    own (numbered backreferences would shift) or the patterns can't be joined,
+    each is matched separately with its precompiled regex instead.
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._compiled = [re.compile(pattern) for pattern in self.patterns]
+        self._combined = None
+        if all(compiled.groups == 0 for compiled in self._compiled):
+            try:
+                self._combined = re.compile(
+                    "|".join(f"(?P<p{i}>{pattern})" for i, pattern in enumerate(self.patterns))
+                )
+            except re.error:
+                self._combined = None
+
+    def match(self, key: str) -> Optional[str]:
+        """Return the first pattern matching key, or None."""
+        if self._combined is not None:
+            m = self._combined.match(key)
+            return self.patterns[int(m.lastgroup[1:])] if m else None
+        for pattern, compiled in zip(self.patterns, self._compiled):
+            if compiled.match(key):
+                return pattern
+        return None
+
+    def classify_keys(self, keys) -> dict:
+        """Map each key to its first matching pattern (None when nothing matches)."""
+        match = self.match
+        return {key: match(key) for key in keys}
 
 # --- SCHEMA NORMALIZER ---
-def normalize_openapi_schema(openapi_schema: dict) -> dict:
-    required_fields = set(openapi_schema.get("required", []))
-    properties = openapi_schema.get("properties", {})
+def normalize_openapi_schema(openapi_schema: dict, memo: Optional[dict] = None) -> dict:
+    # memo maps id(sub-schema) to its normalized form; share one across calls
+    # so sub-schemas referenced from many places are normalized only once
+    if memo is None:
+        memo = {}
     pattern_properties = openapi_schema.get("patternProperties", {})
 
     def normalize_field(meta, is_required=False):
@@ -31,30 +72,60 @@ def normalize_openapi_schema(openapi_schema: dict) -> dict:
             norm["enum"] = meta["enum"]
 
         if field_type == "object":
-            nested_required = set(meta.get("required", []))
-            nested_props = meta.get("properties", {})
-            norm["properties"] = normalize_properties(nested_props, nested_required)
+            norm["properties"] = normalize_object(meta)
 
         elif field_type == "array":
-            norm["items"] = normalize_field(meta.get("items", {"type": "string"}))
+            norm["items"] = normalize_items(meta.get("items", {"type": "string"}))
 
         return norm
 
+    def normalize_object(meta):
+        key = ("properties", id(meta))
+        if key in memo:
+            return memo[key][1]
+        result = {}
+        # Registered before filling so recursive schemas terminate; meta is
+        # kept alongside so its id can't be reused while memo lives
+        memo[key] = (meta, result)
+        nested_required = set(meta.get("required", []))
+        result.update(normalize_properties(meta.get("properties", {}), nested_required))
+        return result
+
+    def normalize_items(meta):
+        key = ("items", id(meta))
+        if key not in memo:
+            memo[key] = (meta, normalize_field(meta))
+        return memo[key][1]
+
     def normalize_properties(props, required_set):
         result = {}
         for field, meta in props.items():
             result[field] = normalize_field(meta, field in required_set)
         return result
 
-    normalized = normalize_properties(properties, required_fields)
+    # Copy so the pattern keys below don't leak into shared memo entries
+    normalized = dict(normalize_object(openapi_schema))
 
     if pattern_properties:
         normalized["__patternProperties__"] = {
             pattern: normalize_field(meta) for pattern, meta in pattern_properties.items()
         }
+        normalized["__patternMatcher__"] = PatternMatcher(pattern_properties)
 
     return normalized
 
+def normalize_all_schemas(spec: dict) -> dict:
+    """Normalize every components.schemas entry of a spec whose $refs are already resolved.
+
+    Resolved refs are shared objects, so one memo across all schemas means
+    common types (Address, Error, ...) are normalized once and shared.
+    """
+    memo = {}
+    return {
+        name: normalize_openapi_schema(schema_node, memo)
+        for name, schema_node in spec["components"]["schemas"].items()
+    }
+
 # --- LANGGRAPH STATE ---
 class ConfigState(TypedDict):
     config: dict
@@ -99,6 +170,13 @@ openapi_schema = {
 
 schema = normalize_openapi_schema(openapi_schema)
 
+def classify_keys(keys, schema_node: Optional[dict] = None) -> dict:
+    """Map dynamic keys to the patternProperties pattern each one falls under."""
+    matcher = (schema_node or schema).get("__patternMatcher__")
+    if matcher is None:
+        return {key: None for key in keys}
+    return matcher.classify_keys(keys)
+
 # --- LANGGRAPH NODES ---
 def pick_next_field(state: ConfigState) -> ConfigState:
     for field, meta in schema.items():
@@ -121,25 +199,15 @@ def ask_field(state: ConfigState) -> str:
     return f"{meta['description']} ({meta['type']})"
 
 def parse_input(user_input: str, meta: dict) -> Any:
+    if meta.get("type") == "object":
+        nested = {}
+        for subkey, submeta in meta.get("properties", {}).items():
+            val = input(f"  > {subkey} ({submeta['type']}): ").strip()
+            nested[subkey] = parse_input(val, submeta)
+        return nested
     try:
-        field_type = meta.get("type")
-        if field_type == "string":
-            return str(user_input)
-        elif field_type == "integer":
-            return int(user_input)
-        elif field_type == "boolean":
-            return user_input.lower() in ["true", "yes", "1"]
-        elif field_type == "array":
-            return [item.strip() for item in user_input.split(",")]
-        elif field_type == "object":
-            nested = {}
-            for subkey, submeta in meta.get("properties", {}).items():
-                val = input(f"  > {subkey} ({submeta['type']}): ").strip()
-                nested[subkey] = parse_input(val, submeta)
-            return nested
-        elif field_type == "any":
-            return user_input
-    except:
+        return validator_for(meta).coerce(user_input)
+    except ValidationError:
         return None
 
 def store_response(state: ConfigState, user_input: str) -> ConfigState:
@@ -201,23 +269,22 @@ def run_agent():
     # Handle patternProperties interactively
     if "__patternProperties__" in schema:
         print("\n💡 Add dynamic fields (like `x-feature`, `tags-ui`, `z-anykey`). Type 'done' to finish.")
+        matcher = schema["__patternMatcher__"]
         while True:
             dyn_key = input("🔑 Dynamic key: ").strip()
             if dyn_key.lower() == "done":
                 break
-            matched = False
-            for pattern, meta in schema["__patternProperties__"].items():
-                if re.match(pattern, dyn_key):
-                    val = input(f"  📥 Value for {dyn_key} ({meta['type']}): ").strip()
-                    parsed = parse_input(val, meta)
-                    if parsed is not None:
-                        state["config"][dyn_key] = parsed
-                    else:
-                        print("❌ Invalid input.")
-                    matched = True
-                    break
-            if not matched:
+            pattern = matcher.match(dyn_key)
+            if pattern is None:
                 print("⚠️ No matching pattern found.")
+                continue
+            meta = schema["__patternProperties__"][pattern]
+            val = input(f"  📥 Value for {dyn_key} ({meta['type']}): ").strip()
+            parsed = parse_input(val, meta)
+            if parsed is not None:
+                state["config"][dyn_key] = parsed
+            else:
+                print("❌ Invalid input.")
 
     state = apply_defaults(state)
     output_config(state["config"])
@@ -1,38 +1,629 @@
+import os
+import sys
+import time
+import bisect
+import asyncio
+import secrets
+import hashlib
+import argparse
+from collections import deque
+from contextlib import asynccontextmanager
+from urllib.parse import urlencode, urlsplit
 from fastapi import FastAPI, Request, Response
-from sse_starlette.sse import EventSourceResponse
+from sse_starlette.sse import EventSourceResponse, ServerSentEvent
 import httpx
 
-app = FastAPI()
+# ---- Upstream pool settings ----
+MCP_SERVER_A = os.getenv("MCP_SERVER_A", "http://mcp-server-a:5000/sse")
+MCP_SERVER_B = os.getenv("MCP_SERVER_B", "http://mcp-server-b:5000/sse")
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "1000"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "100"))
+UPSTREAM_KEEPALIVE_EXPIRY = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+BACKEND_MAX_STREAMS = int(os.getenv("BACKEND_MAX_STREAMS", "500"))
+BACKEND_ACQUIRE_TIMEOUT = float(os.getenv("BACKEND_ACQUIRE_TIMEOUT", "5"))
+
+# ---- Routing settings ----
+MCP_BACKENDS = [url.strip() for url in os.getenv("MCP_BACKENDS", f"{MCP_SERVER_A},{MCP_SERVER_B}").split(",") if url.strip()]
+RING_VNODES = int(os.getenv("RING_VNODES", "160"))
+HEALTH_PATH = os.getenv("HEALTH_PATH", "/health")
+HEALTH_INTERVAL = float(os.getenv("HEALTH_INTERVAL", "5"))
+HEALTH_TIMEOUT = float(os.getenv("HEALTH_TIMEOUT", "2"))
+HEALTH_FAILS = int(os.getenv("HEALTH_FAILS", "3"))  # consecutive failures before ejecting
+HEALTH_RISES = int(os.getenv("HEALTH_RISES", "2"))  # consecutive successes before re-admitting
+
+# ---- Fan-out settings ----
+SSE_FANOUT = os.getenv("SSE_FANOUT", "0").lower() in ("1", "true", "yes")
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "256"))
+SLOW_CONSUMER_POLICY = os.getenv("SLOW_CONSUMER_POLICY", "drop-oldest")  # or "disconnect"
+REPLAY_BUFFER_SIZE = int(os.getenv("REPLAY_BUFFER_SIZE", "1000"))  # recent events kept per stream
+STREAM_LINGER = float(os.getenv("STREAM_LINGER", "30"))  # seconds a stream outlives its last subscriber
+
+# ---- Streaming settings ----
+DISCONNECT_POLL_INTERVAL = float(os.getenv("DISCONNECT_POLL_INTERVAL", "1.0"))
+SSE_BATCH_WINDOW = float(os.getenv("SSE_BATCH_WINDOW", "0"))  # seconds; 0 writes each event at once
+SSE_BATCH_MAX = int(os.getenv("SSE_BATCH_MAX", "64"))  # events per write
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 with the optional h2 package installed
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+class BackendBusy(Exception):
+    pass
+
+class UpstreamPool:
+    """One httpx client for the app's lifetime, with a stream cap per backend.
+
+    Every SSE subscriber borrows a connection from the shared pool instead of
+    building its own client, and each backend host gets at most
+    `max_streams_per_backend` concurrent upstream streams.
+    """
+
+    def __init__(self, max_connections: int = UPSTREAM_MAX_CONNECTIONS,
+                 max_keepalive: int = UPSTREAM_MAX_KEEPALIVE,
+                 keepalive_expiry: float = UPSTREAM_KEEPALIVE_EXPIRY,
+                 max_streams_per_backend: int = BACKEND_MAX_STREAMS,
+                 acquire_timeout: float = BACKEND_ACQUIRE_TIMEOUT):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.max_streams_per_backend = max_streams_per_backend
+        self.acquire_timeout = acquire_timeout
+        self.http2 = _http2_available()
+        self.client = None
+        self._slots = {}  # backend -> asyncio.Semaphore
+        self._stats = {}  # backend -> counters
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            # Streams are long-lived: no read timeout, bounded wait for a pooled connection
+            timeout=httpx.Timeout(None, connect=UPSTREAM_CONNECT_TIMEOUT, pool=self.acquire_timeout),
+            limits=self.limits,
+            http2=self.http2
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    @staticmethod
+    def backend_of(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def _backend_stats(self, backend: str) -> dict:
+        if backend not in self._stats:
+            self._slots[backend] = asyncio.Semaphore(self.max_streams_per_backend)
+            self._stats[backend] = {"active": 0, "opened": 0, "rejected": 0, "errors": 0}
+        return self._stats[backend]
+
+    @asynccontextmanager
+    async def stream(self, url: str, headers: dict = None):
+        backend = self.backend_of(url)
+        stats = self._backend_stats(backend)
+        try:
+            await asyncio.wait_for(self._slots[backend].acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            stats["rejected"] += 1
+            raise BackendBusy(f"{backend} is at its limit of {self.max_streams_per_backend} streams")
+
+        stats["active"] += 1
+        stats["opened"] += 1
+        try:
+            async with self.client.stream("GET", url, headers=headers) as response:
+                yield response
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["active"] -= 1
+            self._slots[backend].release()
+
+    def metrics(self) -> dict:
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "max_streams_per_backend": self.max_streams_per_backend,
+            "active_streams": sum(stats["active"] for stats in self._stats.values()),
+            "backends": {backend: dict(stats) for backend, stats in self._stats.items()}
+        }
+
+upstream = UpstreamPool()
+
+# ---- SSE framing ----
+_END = object()  # queued to tell a consumer its stream is over
+
+async def iter_sse_events(lines):
+    """Parse upstream SSE lines into event dicts, following the SSE spec.
+
+    `data:` lines accumulate until a blank line dispatches the event, and
+    `event:`, `id:` and `retry:` are kept as fields of that event; comments
+    and unknown fields are skipped.
+    """
+    data, event, event_id, retry = [], None, None, None
+    async for line in lines:
+        if not line:
+            if data:
+                item = {"data": "\n".join(data)}
+                if event:
+                    item["event"] = event
+                if event_id is not None:
+                    item["id"] = event_id
+                if retry is not None:
+                    item["retry"] = retry
+                yield item
+            data, event, event_id, retry = [], None, None, None
+            continue
+        if line.startswith(":"):
+            continue
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "data":
+            data.append(value)
+        elif field == "event":
+            event = value
+        elif field == "id" and "\0" not in value:
+            event_id = value
+        elif field == "retry" and value.isdigit():
+            retry = int(value)
+
+def encode_event(item: dict) -> bytes:
+    # Encoded once in the pump; EventSourceResponse writes bytes through as-is
+    return ServerSentEvent(**item).encode()
+
+def _error_frame(message: str) -> bytes:
+    return encode_event({"event": "error", "data": f"Error: {message}"})
+
+def _close_queue(queue: asyncio.Queue):
+    # Make room so the end marker always fits
+    while queue.full():
+        queue.get_nowait()
+    queue.put_nowait(_END)
+
+async def _drain(queue: asyncio.Queue):
+    """Yield queued frames until _END, merging those within SSE_BATCH_WINDOW into one write."""
+    while True:
+        frame = await queue.get()
+        if frame is _END:
+            return
+        if SSE_BATCH_WINDOW > 0:
+            await asyncio.sleep(SSE_BATCH_WINDOW)
+            frames = [frame]
+            while len(frames) < SSE_BATCH_MAX and not queue.empty():
+                frame = queue.get_nowait()
+                if frame is _END:
+                    yield b"".join(frames)
+                    return
+                frames.append(frame)
+            frame = b"".join(frames)
+        yield frame
+
+async def _watch_disconnect(request: Request, on_disconnect):
+    # Polls the client once per interval instead of once per upstream line
+    while not await request.is_disconnected():
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    on_disconnect()
+
+# ---- Upstream fan-out ----
+class Subscriber:
+    def __init__(self, queue_size: int):
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+        self.kicked = False  # disconnected by the slow-consumer policy
+
+class ReplayBuffer:
+    """Bounded ring of (event id, encoded frame) for Last-Event-ID replay."""
+
+    def __init__(self, size: int = REPLAY_BUFFER_SIZE):
+        self._events = deque(maxlen=size)
+
+    def __len__(self):
+        return len(self._events)
+
+    def append(self, event_id: str, frame: bytes):
+        self._events.append((event_id, frame))
+
+    def since(self, last_event_id: str):
+        """Frames after last_event_id, or None when that id is no longer buffered."""
+        for i in range(len(self._events) - 1, -1, -1):
+            if self._events[i][0] == last_event_id:
+                return [frame for _, frame in list(self._events)[i + 1:]]
+        return None
+
+class SharedStream:
+    """One upstream stream whose lines are broadcast to every subscriber.
+
+    Each subscriber reads from its own bounded queue. When a queue is full,
+    `policy` either drops that subscriber's oldest event ("drop-oldest") or
+    disconnects it ("disconnect"); the upstream read never blocks on a slow
+    client.
+    """
+
+    def __init__(self, hub, key: tuple, url: str):
+        self.hub = hub
+        self.key = key
+        self.url = url
+        self.subscribers = set()
+        self.task = None
+        self.expiry = None  # pending linger teardown
+        self.replay = ReplayBuffer(hub.replay_size)
+        # Prefix for ids the proxy assigns, so ids from an earlier stream never match
+        self.epoch = secrets.token_hex(4)
+        self.seq = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self._pump())
+
+    async def _pump(self):
+        try:
+            async with upstream.stream(self.url) as backend_response:
+                async for event in iter_sse_events(backend_response.aiter_lines()):
+                    self.seq += 1
+                    if "id" not in event:
+                        event["id"] = f"{self.epoch}-{self.seq}"
+                    frame = encode_event(event)
+                    self.replay.append(event["id"], frame)
+                    self._broadcast(frame)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._broadcast(_error_frame(str(e)))
+        finally:
+            self.hub._forget(self)
+            for subscriber in list(self.subscribers):
+                _close_queue(subscriber.queue)
+
+    def _broadcast(self, frame: bytes):
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                if self.hub.policy == "disconnect":
+                    subscriber.kicked = True
+                    self.subscribers.discard(subscriber)
+                    _close_queue(subscriber.queue)
+                else:
+                    subscriber.queue.get_nowait()
+                    subscriber.dropped += 1
+                    subscriber.queue.put_nowait(frame)
+
+class StreamHub:
+    """Registry of shared upstream streams keyed by (backend URL, stream key).
+
+    Streams are reference counted: the first subscriber opens the upstream
+    stream, and `linger` seconds after the last one leaves it is torn down.
+    While it lingers it keeps filling its replay buffer, so a client that
+    reconnects with Last-Event-ID gets the events it missed.
+    """
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE, policy: str = SLOW_CONSUMER_POLICY,
+                 replay_size: int = REPLAY_BUFFER_SIZE, linger: float = STREAM_LINGER):
+        if policy not in ("drop-oldest", "disconnect"):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.replay_size = replay_size
+        self.linger = linger
+        self._streams = {}
+
+    def subscribe(self, url: str, stream_key: str = "", last_event_id: str = None) -> tuple:
+        key = (url, stream_key)
+        stream = self._streams.get(key)
+        if stream is None:
+            upstream_url = f"{url}?{urlencode({'stream': stream_key})}" if stream_key else url
+            stream = self._streams[key] = SharedStream(self, key, upstream_url)
+            stream.start()
+        if stream.expiry is not None:
+            stream.expiry.cancel()
+            stream.expiry = None
+
+        missed = stream.replay.since(last_event_id) if last_event_id else None
+        subscriber = Subscriber(self.queue_size + len(missed or ()))
+        for frame in missed or ():
+            subscriber.queue.put_nowait(frame)
+        # No await since the replay, so nothing is lost or duplicated in between
+        stream.subscribers.add(subscriber)
+        return stream, subscriber
+
+    def unsubscribe(self, stream: SharedStream, subscriber: Subscriber):
+        stream.subscribers.discard(subscriber)
+        if stream.subscribers or self._streams.get(stream.key) is not stream:
+            return
+        if self.linger > 0:
+            if stream.expiry is None:
+                stream.expiry = asyncio.get_running_loop().call_later(self.linger, self._expire, stream)
+        else:
+            self._expire(stream)
+
+    def _expire(self, stream: SharedStream):
+        stream.expiry = None
+        if not stream.subscribers:
+            self._forget(stream)
+            stream.task.cancel()
+
+    def _forget(self, stream: SharedStream):
+        if self._streams.get(stream.key) is stream:
+            del self._streams[stream.key]
+
+    def metrics(self) -> dict:
+        return {
+            "policy": self.policy,
+            "streams": len(self._streams),
+            "subscribers": sum(len(stream.subscribers) for stream in self._streams.values()),
+            "lingering": sum(1 for stream in self._streams.values() if not stream.subscribers),
+            "buffered_events": sum(len(stream.replay) for stream in self._streams.values()),
+            "dropped": sum(sub.dropped for stream in self._streams.values() for sub in stream.subscribers)
+        }
+
+hub = StreamHub()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await upstream.start()
+    router.start()
+    yield
+    await router.stop()
+    await upstream.close()
+
+app = FastAPI(lifespan=lifespan)
+
+# ---- Backend routing ----
+class HashRing:
+    """Consistent-hash ring with `vnodes` virtual nodes per backend.
+
+    Adding or removing a backend only moves the keys on its own arcs, about
+    1/N of all keys, instead of reshuffling everyone.
+    """
+
+    def __init__(self, backends=(), vnodes: int = RING_VNODES):
+        self.vnodes = vnodes
+        self.backends = []
+        self._hashes = []
+        self._owners = []
+        for backend in backends:
+            self.add(backend)
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+    def _rebuild(self):
+        points = sorted(
+            (self._hash(f"{backend}#{i}"), backend)
+            for backend in self.backends for i in range(self.vnodes)
+        )
+        self._hashes = [h for h, _ in points]
+        self._owners = [backend for _, backend in points]
+
+    def add(self, backend: str):
+        if backend not in self.backends:
+            self.backends.append(backend)
+            self._rebuild()
+
+    def remove(self, backend: str):
+        if backend in self.backends:
+            self.backends.remove(backend)
+            self._rebuild()
+
+    def lookup(self, key: str, healthy=None) -> str:
+        """Owner of key, skipping clockwise past backends not in `healthy`."""
+        if not self._owners:
+            raise LookupError("No backends configured")
+        start = bisect.bisect(self._hashes, self._hash(key)) % len(self._owners)
+        if healthy is None:
+            return self._owners[start]
+        for offset in range(len(self._owners)):
+            owner = self._owners[(start + offset) % len(self._owners)]
+            if owner in healthy:
+                return owner
+        return self._owners[start]  # nothing healthy: let the request fail upstream
+
+class BackendRouter:
+    """Routes users over a HashRing and ejects backends that fail health checks.
+
+    Ejected backends stay on the ring and are only skipped, so users of
+    healthy backends never move, and re-admitted ones get their keys back.
+    """
+
+    def __init__(self, backends, vnodes: int = RING_VNODES):
+        self.ring = HashRing(backends, vnodes)
+        self.healthy = set(backends)
+        self._fails = {}
+        self._rises = {}
+        self._task = None
+
+    def select(self, user_id: str) -> str:
+        return self.ring.lookup(user_id, self.healthy)
+
+    def add_backend(self, backend: str):
+        self.ring.add(backend)
+        self.healthy.add(backend)
+
+    def remove_backend(self, backend: str):
+        self.ring.remove(backend)
+        self.healthy.discard(backend)
+
+    @staticmethod
+    def health_url(backend: str) -> str:
+        return UpstreamPool.backend_of(backend) + HEALTH_PATH
+
+    async def _check(self, backend: str) -> bool:
+        try:
+            response = await upstream.client.get(self.health_url(backend), timeout=HEALTH_TIMEOUT)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def probe_once(self):
+        backends = list(self.ring.backends)
+        results = await asyncio.gather(*(self._check(backend) for backend in backends))
+        for backend, ok in zip(backends, results):
+            if ok:
+                self._fails[backend] = 0
+                self._rises[backend] = self._rises.get(backend, 0) + 1
+                if backend not in self.healthy and self._rises[backend] >= HEALTH_RISES:
+                    self.healthy.add(backend)
+            else:
+                self._rises[backend] = 0
+                self._fails[backend] = self._fails.get(backend, 0) + 1
+                if backend in self.healthy and self._fails[backend] >= HEALTH_FAILS:
+                    self.healthy.discard(backend)
+
+    async def _run(self):
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def metrics(self) -> dict:
+        return {
+            "backends": list(self.ring.backends),
+            "healthy": sorted(self.healthy),
+            "vnodes": self.ring.vnodes
+        }
+
+router = BackendRouter(MCP_BACKENDS)
 
-# Simulated logic to determine backend (replace with real logic)
 def select_mcp_backend(user_id: str) -> str:
-    # Example: hash-based routing, lookup in Redis, etc.
-    # For now, route user_id ending with even digit to server A, else B
-    if int(user_id[-1]) % 2 == 0:
-        return "http://mcp-server-a:5000/sse"
-    else:
-        return "http://mcp-server-b:5000/sse"
+    return router.select(user_id)
 
 # Extract user (simulate JWT decode or cookie parsing)
 def extract_user_id(request: Request) -> str:
     # In production, extract from JWT token or cookie/session
     return request.headers.get("x-user-id", "user42")  # fallback to demo ID
 
+@app.get("/metrics")
+async def metrics():
+    return {**upstream.metrics(), "cpu_seconds": time.process_time(), "routing": router.metrics(), "fanout": hub.metrics() if SSE_FANOUT else None}
+
 @app.get("/sse")
 async def sse_proxy(request: Request):
     user_id = extract_user_id(request)
     backend_url = select_mcp_backend(user_id)
 
-    async def event_generator():
-        async with httpx.AsyncClient(timeout=None) as client:
-            try:
-                async with client.stream("GET", backend_url) as backend_response:
-                    async for line in backend_response.aiter_lines():
-                        if await request.is_disconnected():
-                            break
-                        if line.strip():
-                            yield {"data": line}
-            except Exception as e:
-                yield {"event": "error", "data": f"Error: {str(e)}"}
-
-    return EventSourceResponse(event_generator())
\ No newline at end of file
+    last_event_id = request.headers.get("last-event-id")
+    if SSE_FANOUT:
+        stream_key = request.query_params.get("stream", "")
+        return EventSourceResponse(shared_event_generator(request, backend_url, stream_key, last_event_id))
+
+    return EventSourceResponse(direct_event_generator(request, backend_url, last_event_id))
+
+async def direct_event_generator(request: Request, backend_url: str, last_event_id: str = None):
+    # Without fan-out there is no shared buffer; pass the id on so the backend can resume
+    queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+    headers = {"Last-Event-ID": last_event_id} if last_event_id else None
+
+    async def pump():
+        try:
+            async with upstream.stream(backend_url, headers=headers) as backend_response:
+                async for event in iter_sse_events(backend_response.aiter_lines()):
+                    await queue.put(encode_event(event))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await queue.put(_error_frame(str(e)))
+        await queue.put(_END)
+
+    pump_task = asyncio.create_task(pump())
+
+    def on_disconnect():
+        pump_task.cancel()
+        _close_queue(queue)
+
+    watcher = asyncio.create_task(_watch_disconnect(request, on_disconnect))
+    try:
+        async for frame in _drain(queue):
+            yield frame
+    finally:
+        watcher.cancel()
+        pump_task.cancel()
+
+async def shared_event_generator(request: Request, backend_url: str, stream_key: str,
+                                 last_event_id: str = None):
+    stream, subscriber = hub.subscribe(backend_url, stream_key, last_event_id)
+    watcher = asyncio.create_task(_watch_disconnect(request, lambda: _close_queue(subscriber.queue)))
+    try:
+        async for frame in _drain(subscriber.queue):
+            yield frame
+        if subscriber.kicked:
+            yield _error_frame("client too slow, disconnected")
+    finally:
+        watcher.cancel()
+        hub.unsubscribe(stream, subscriber)
+
+# ---- Router benchmark ----
+def benchmark_router(backend_count: int = 3, vnodes: int = RING_VNODES, keys: int = 200_000) -> dict:
+    """Routing decisions/sec, key spread, and how many keys move when a backend joins or leaves."""
+    backends = [f"http://mcp-server-{i}:5000/sse" for i in range(backend_count)]
+    ring = HashRing(backends, vnodes)
+    healthy = set(backends)
+    user_ids = [f"user{i}" for i in range(keys)]
+
+    start = time.perf_counter()
+    before = [ring.lookup(user_id, healthy) for user_id in user_ids]
+    elapsed = time.perf_counter() - start
+
+    counts = {backend: 0 for backend in backends}
+    for owner in before:
+        counts[owner] += 1
+    fair_share = keys / backend_count
+
+    added = "http://mcp-server-new:5000/sse"
+    ring.add(added)
+    after_add = [ring.lookup(user_id) for user_id in user_ids]
+    moved_add = [(old, new) for old, new in zip(before, after_add) if old != new]
+
+    ring.remove(added)
+    ring.remove(backends[0])
+    after_remove = [ring.lookup(user_id) for user_id in user_ids]
+    moved_remove = [(old, new) for old, new in zip(before, after_remove) if old != new]
+
+    return {
+        "decisions_per_sec": keys / elapsed,
+        "spread_min": min(counts.values()) / fair_share,
+        "spread_max": max(counts.values()) / fair_share,
+        "moved_on_add": len(moved_add) / keys,
+        "ideal_on_add": 1 / (backend_count + 1),
+        # Consistent hashing: keys only ever move onto the new backend...
+        "add_only_to_new": all(new == added for _, new in moved_add),
+        "moved_on_remove": len(moved_remove) / keys,
+        "ideal_on_remove": 1 / backend_count,
+        # ...or off the removed one
+        "remove_only_from_removed": all(old == backends[0] for old, _ in moved_remove)
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SSE proxy utilities (serve the app with uvicorn alpha:app).")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench-router", help="Benchmark consistent-hash routing and rebalancing")
+    bench.add_argument("--backends", type=int, default=3)
+    bench.add_argument("--vnodes", type=int, default=RING_VNODES)
+    bench.add_argument("--keys", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.command == "bench-router":
+        result = benchmark_router(args.backends, args.vnodes, args.keys)
+        for name, value in result.items():
+            print(f"{name:>26}: {value:.4f}" if isinstance(value, float) else f"{name:>26}: {value}")
+        sys.exit(0 if result["add_only_to_new"] and result["remove_only_from_removed"] else 1)
@@ -1,24 +1,117 @@
-import jsonref
+import os
+import sys
+import mmap
+import pickle
+import hashlib
+import argparse
 import yaml
 
+# libyaml-backed loader when PyYAML was built with it, pure Python otherwise
+_SpecLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def _load_spec(file_path: str) -> dict:
+    with open(file_path, "rb") as f:
+        return yaml.load(f, Loader=_SpecLoader)
+
+def _resolve_pointer(spec: dict, ref: str):
+    if ref == "#":
+        return spec
+    if not ref.startswith("#/"):
+        raise ValueError(f"Only local $refs are supported: {ref}")
+
+    node = spec
+    for part in ref[2:].split("/"):
+        part = part.replace("~1", "/").replace("~0", "~")
+        node = node[int(part)] if isinstance(node, list) else node[part]
+    return node
+
+def resolve_refs(spec: dict, node, memo: dict = None):
+    """Return a copy of `node` with local $refs replaced by their targets.
+
+    Only the part of the spec reachable from `node` is visited. Each ref is
+    resolved once and the result is shared by every place that references it;
+    a recursive ref points back at the dict being built, so recursive schemas
+    become a finite cyclic structure instead of an endless expansion.
+    """
+    if memo is None:
+        memo = {}
+    if isinstance(node, list):
+        return [resolve_refs(spec, item, memo) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    ref = node.get("$ref")
+    if not isinstance(ref, str):
+        return {key: resolve_refs(spec, value, memo) for key, value in node.items()}
+
+    if ref in memo:
+        if memo[ref] is None:
+            raise ValueError(f"$ref cycle with no schema in between: {ref}")
+        return memo[ref]
+
+    # Follow aliases (a target that is itself a bare $ref) to the first real target
+    chain = [ref]
+    target = _resolve_pointer(spec, ref)
+    while isinstance(target, dict) and isinstance(target.get("$ref"), str):
+        next_ref = target["$ref"]
+        if next_ref in memo and memo[next_ref] is not None:
+            for alias in chain:
+                memo[alias] = memo[next_ref]
+            return memo[next_ref]
+        if next_ref in chain:
+            raise ValueError(f"$ref cycle with no schema in between: {ref}")
+        chain.append(next_ref)
+        target = _resolve_pointer(spec, next_ref)
+
+    if isinstance(target, dict):
+        # Register under every alias before descending so recursive refs find this dict
+        resolved = {}
+        for alias in chain:
+            memo[alias] = resolved
+        for key, value in target.items():
+            resolved[key] = resolve_refs(spec, value, memo)
+        return resolved
+
+    # A non-object target can't be shared while it is being built
+    for alias in chain:
+        memo[alias] = None
+    resolved = resolve_refs(spec, target, memo)
+    for alias in chain:
+        memo[alias] = resolved
+    return resolved
+
+def _schema_ref(schema_name: str) -> str:
+    return "#/components/schemas/" + schema_name.replace("~", "~0").replace("/", "~1")
+
 def load_openapi_schema(file_path: str, schema_name: str) -> dict:
-    with open(file_path, "r") as f:
-        spec = yaml.safe_load(f)
+    spec = _load_spec(file_path)
+    spec["components"]["schemas"][schema_name]  # KeyError for unknown schemas
+    return resolve_refs(spec, {"$ref": _schema_ref(schema_name)})
 
-    resolved = jsonref.replace_refs(spec)
-    return resolved["components"]["schemas"][schema_name]
+def normalize_openapi_schema(openapi_schema: dict, memo: dict = None) -> dict:
+    """Normalize an object schema's properties into the agent's field format.
 
-def normalize_openapi_schema(openapi_schema: dict) -> dict:
-    properties = openapi_schema.get("properties", {})
-    required_fields = set(openapi_schema.get("required", []))
+    `memo` maps id(object schema) to its normalized properties. Passing the
+    same memo across calls normalizes shared sub-schemas once and returns the
+    same dict for each use; recursive schemas come back as cyclic dicts.
+    """
+    if memo is None:
+        memo = {}
 
-    def normalize(prop_dict, required_set=None):
+    def normalize(schema_node):
+        key = id(schema_node)
+        if key in memo:
+            return memo[key][1]
         result = {}
-        for field, meta in prop_dict.items():
+        # Keep schema_node alive alongside its id so the id can't be reused
+        memo[key] = (schema_node, result)
+
+        required_set = set(schema_node.get("required", []))
+        for field, meta in schema_node.get("properties", {}).items():
             norm = {
                 "type": meta["type"],
                 "description": meta.get("description", ""),
-                "required": field in required_set if required_set else False
+                "required": field in required_set
             }
 
             if "default" in meta:
@@ -26,12 +119,194 @@ def normalize_openapi_schema(openapi_schema: dict) -> dict:
             if "enum" in meta:
                 norm["enum"] = meta["enum"]
             if meta["type"] == "object":
-                nested_required = set(meta.get("required", []))
-                norm["properties"] = normalize(meta.get("properties", {}), nested_required)
+                norm["properties"] = normalize(meta)
             elif meta["type"] == "array":
                 norm["items"] = meta["items"]
 
             result[field] = norm
         return result
 
-    return normalize(properties, required_fields)
\ No newline at end of file
+    return normalize(openapi_schema)
+
+def normalize_all_schemas(spec: dict) -> dict:
+    """Resolve and normalize every components.schemas entry of a loaded spec in one pass."""
+    ref_memo, norm_memo = {}, {}
+    return {
+        schema_name: normalize_openapi_schema(
+            resolve_refs(spec, {"$ref": _schema_ref(schema_name)}, ref_memo), norm_memo
+        )
+        for schema_name in spec["components"]["schemas"]
+    }
+
+# ---- Compiled Spec Cache ----
+# Bump when the resolved/normalized output changes shape
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = os.getenv("APISPEC_CACHE_DIR", os.path.expanduser("~/.cache/apispecload"))
+
+def _file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _cache_path(cache_dir: str, spec_hash: str, schema_name: str) -> str:
+    name_hash = hashlib.sha256(schema_name.encode()).hexdigest()[:16]
+    return os.path.join(cache_dir, spec_hash[:2], f"{spec_hash}-{name_hash}.pkl")
+
+def _read_cache(path: str):
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            version, resolved, normalized = pickle.loads(mm)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+        return None
+    if version != CACHE_VERSION:
+        return None
+    return resolved, normalized
+
+def _write_cache(path: str, resolved: dict, normalized: dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump((CACHE_VERSION, resolved, normalized), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+def load_normalized_schema(file_path: str, schema_name: str, cache_dir: str = None) -> tuple:
+    """Return (resolved, normalized) for a schema, served from the on-disk cache when warm.
+
+    Cache entries are keyed by the spec's content hash and the schema name, so
+    an edited spec simply misses and is recompiled.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    path = _cache_path(cache_dir, _file_hash(file_path), schema_name)
+    cached = _read_cache(path)
+    if cached is not None:
+        return cached
+
+    resolved = load_openapi_schema(file_path, schema_name)
+    normalized = normalize_openapi_schema(resolved)
+    _write_cache(path, resolved, normalized)
+    return resolved, normalized
+
+def prewarm_cache(spec_dir: str, cache_dir: str = None) -> dict:
+    """Compile every component schema of every spec under `spec_dir` into the cache."""
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    report = {"specs": 0, "written": 0, "cached": 0, "failed": []}
+
+    for root, _, files in os.walk(spec_dir):
+        for name in sorted(files):
+            if not name.endswith((".yaml", ".yml", ".json")):
+                continue
+            file_path = os.path.join(root, name)
+            try:
+                spec_hash = _file_hash(file_path)
+                spec = _load_spec(file_path)
+            except (OSError, yaml.YAMLError) as e:
+                report["failed"].append(f"{file_path}: {type(e).__name__}: {e}")
+                continue
+            if not isinstance(spec, dict):
+                report["failed"].append(f"{file_path}: not a spec (top level is {type(spec).__name__})")
+                continue
+            schemas = spec.get("components", {}).get("schemas", {})
+            if not schemas:
+                continue
+            report["specs"] += 1
+
+            memo, norm_memo = {}, {}  # shared across this spec's schemas
+            for schema_name in schemas:
+                path = _cache_path(cache_dir, spec_hash, schema_name)
+                if _read_cache(path) is not None:  # stale-version or corrupt entries get rewritten
+                    report["cached"] += 1
+                    continue
+                try:
+                    resolved = resolve_refs(spec, {"$ref": _schema_ref(schema_name)}, memo)
+                    normalized = normalize_openapi_schema(resolved, norm_memo)
+                except (KeyError, ValueError, RecursionError) as e:
+                    report["failed"].append(f"{file_path}#{schema_name}: {type(e).__name__}: {e}")
+                    memo, norm_memo = {}, {}  # may hold half-built entries now
+                    continue
+                _write_cache(path, resolved, normalized)
+                report["written"] += 1
+
+    return report
+
+# ---- Benchmark ----
+def synthetic_spec(schema_count: int) -> dict:
+    """A spec where every schema references the same Address and Error types."""
+    schemas = {
+        "Address": {
+            "type": "object",
+            "required": ["street", "city"],
+            "properties": {name: {"type": "string", "description": name} for name in
+                           ["street", "city", "state", "zip", "country"]}
+        },
+        "Error": {
+            "type": "object",
+            "properties": {
+                "code": {"type": "integer"},
+                "message": {"type": "string"},
+                "details": {"type": "array", "items": {"type": "string"}}
+            }
+        }
+    }
+    for i in range(schema_count):
+        schemas[f"Resource{i}"] = {
+            "type": "object",
+            "required": ["id"],
+            "properties": {
+                "id": {"type": "string", "description": "Identifier"},
+                "status": {"type": "string", "enum": ["active", "inactive"], "default": "active"},
+                "billing": {"$ref": "#/components/schemas/Address"},
+                "shipping": {"$ref": "#/components/schemas/Address"},
+                "error": {"$ref": "#/components/schemas/Error"}
+            }
+        }
+    return {"openapi": "3.0.0", "components": {"schemas": schemas}}
+
+def benchmark_normalization(spec: dict) -> dict:
+    """Time and peak/retained memory of per-schema normalization versus normalize_all_schemas."""
+    import time
+    import tracemalloc
+
+    def per_schema():
+        return {
+            name: normalize_openapi_schema(resolve_refs(spec, {"$ref": _schema_ref(name)}))
+            for name in spec["components"]["schemas"]
+        }
+
+    results = {}
+    for label, run in (("per_schema", per_schema), ("bulk", lambda: normalize_all_schemas(spec))):
+        tracemalloc.start()
+        start = time.perf_counter()
+        output = run()
+        elapsed = time.perf_counter() - start
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        results[label] = {"seconds": elapsed, "peak_mb": peak / 2**20, "retained_mb": retained / 2**20}
+        del output
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAPI schema loader utilities.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    prewarm = commands.add_parser("prewarm", help="Compile all schemas in a directory of specs into the cache")
+    prewarm.add_argument("spec_dir")
+    prewarm.add_argument("--cache-dir", default=None, help=f"Cache location (default: {DEFAULT_CACHE_DIR})")
+    bench = commands.add_parser("bench", help="Compare per-schema and bulk normalization")
+    bench.add_argument("spec", nargs="?", help="Spec file (default: synthetic spec)")
+    bench.add_argument("--synthetic", type=int, default=2000, help="Schema count for the synthetic spec")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        spec = _load_spec(args.spec) if args.spec else synthetic_spec(args.synthetic)
+        print(f"{len(spec['components']['schemas'])} schemas")
+        for label, result in benchmark_normalization(spec).items():
+            print(f"{label:>10}: {result['seconds'] * 1000:8.1f} ms  "
+                  f"peak {result['peak_mb']:7.1f} MB  retained {result['retained_mb']:7.1f} MB")
+
+    if args.command == "prewarm":
+        report = prewarm_cache(args.spec_dir, args.cache_dir)
+        for failure in report["failed"]:
+            print(f"⚠️ {failure}", file=sys.stderr)
+        print(f"{report['specs']} specs: {report['written']} schemas compiled, "
+              f"{report['cached']} already cached, {len(report['failed'])} failed")
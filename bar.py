@@ -1,19 +1,25 @@
+import os
+import sys
+import csv
+import time
+import json
+import hashlib
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
 import yaml
 
+# libyaml's emitter when PyYAML was built with it; the output is the same
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+BAR_PARALLEL_MIN = int(os.getenv("BAR_PARALLEL_MIN", "500"))  # inventory size before rendering goes to a process pool
+RENDER_CHUNK = 64  # deployments per pool task
+
 def get_user_input(prompt, default=None):
     value = input(f"{prompt} {f'[{default}]' if default else ''}: ").strip()
     return value if value else default
 
-def generate_kubernetes_deployment():
-    print("Welcome to the Kubernetes Deployment YAML Generator!")
-    print("Please provide the following information:")
-
-    # Collect user inputs
-    app_name = get_user_input("Enter the application name")
-    image = get_user_input("Enter the container image")
-    replicas = int(get_user_input("Enter the number of replicas", "1"))
-    container_port = int(get_user_input("Enter the container port", "80"))
-
+def build_deployment(app_name, image, replicas=1, container_port=80, namespace=None):
     # Create the deployment structure
     deployment = {
         "apiVersion": "apps/v1",
@@ -50,9 +56,27 @@ def generate_kubernetes_deployment():
             }
         }
     }
+    if namespace:
+        deployment["metadata"]["namespace"] = namespace
+    return deployment
+
+def render_deployment(entry: dict) -> str:
+    return yaml.dump(build_deployment(**entry), Dumper=_Dumper, default_flow_style=False)
+
+def generate_kubernetes_deployment():
+    print("Welcome to the Kubernetes Deployment YAML Generator!")
+    print("Please provide the following information:")
+
+    # Collect user inputs
+    app_name = get_user_input("Enter the application name")
+    image = get_user_input("Enter the container image")
+    replicas = int(get_user_input("Enter the number of replicas", "1"))
+    container_port = int(get_user_input("Enter the container port", "80"))
 
     # Convert the deployment to YAML
-    yaml_output = yaml.dump(deployment, default_flow_style=False)
+    yaml_output = render_deployment(
+        {"app_name": app_name, "image": image, "replicas": replicas, "container_port": container_port}
+    )
 
     print("\nGenerated Kubernetes Deployment YAML:")
     print("-------------------------------------")
@@ -66,5 +90,243 @@ def generate_kubernetes_deployment():
             file.write(yaml_output)
         print(f"YAML saved to {filename}")
 
+# ---- Inventory ----
+def _read_records(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, newline="" if ext == ".csv" else None, encoding="utf-8") as f:
+        if ext == ".csv":
+            yield from csv.DictReader(f)
+        elif ext in (".yaml", ".yml"):
+            data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or []
+            # Either a bare list of apps or {"apps": [...]}
+            yield from (data.get("apps", []) if isinstance(data, dict) else data)
+        elif ext in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise ValueError(f"{path}: unsupported inventory format '{ext}' (use .csv, .yaml or .jsonl)")
+
+def _inventory_entry(record: dict, where: str) -> dict:
+    # CSV cells arrive as strings and blank cells mean "use the default"
+    record = {key.strip(): value for key, value in record.items()
+              if key and value is not None and str(value).strip() != ""}
+    app_name = record.get("app") or record.get("name")
+    if not app_name or not record.get("image"):
+        raise ValueError(f"{where}: every app needs 'app' (or 'name') and 'image'")
+    try:
+        return {
+            "app_name": str(app_name).strip(),
+            "image": str(record["image"]).strip(),
+            "replicas": int(record.get("replicas", 1)),
+            "container_port": int(record.get("port", record.get("container_port", 80))),
+            "namespace": str(record["namespace"]).strip() if "namespace" in record else None,
+        }
+    except ValueError as e:
+        raise ValueError(f"{where} ({app_name}): {e}") from None
+
+def load_inventory(path: str) -> list:
+    """Deployment entries from a CSV, YAML or JSONL inventory of app/name, image, replicas, port, namespace."""
+    entries = []
+    seen = set()
+    for i, record in enumerate(_read_records(path), 1):
+        entry = _inventory_entry(record, f"{path}: entry {i}")
+        key = (entry["namespace"], entry["app_name"])
+        if key in seen:
+            raise ValueError(f"{path}: entry {i}: duplicate app '{entry['app_name']}'")
+        seen.add(key)
+        entries.append(entry)
+    return entries
+
+# ---- Bulk rendering ----
+def render_inventory(entries: list, workers: int = None):
+    """Yield (entry, yaml_text) in inventory order, rendering in a process pool for large inventories."""
+    if len(entries) < BAR_PARALLEL_MIN or (workers or os.cpu_count() or 1) == 1:
+        for entry in entries:
+            yield entry, render_deployment(entry)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from zip(entries, pool.map(render_deployment, entries, chunksize=RENDER_CHUNK))
+
+def output_filename(entry: dict) -> str:
+    prefix = f"{entry['namespace']}-" if entry["namespace"] else ""
+    return f"{prefix}{entry['app_name']}-deployment.yaml"
+
+def write_multi_document(rendered, out) -> int:
+    count = 0
+    for _, text in rendered:
+        out.write("---\n")
+        out.write(text)
+        count += 1
+    return count
+
+# ---- Incremental regeneration ----
+# A manifest next to the output records, per app, a hash of its inventory
+# entry and of this renderer. Only entries whose hash moved are rendered, a
+# file is only rewritten when its bytes differ, and files for apps that left
+# the inventory are deleted, so unchanged apps never show up in a diff.
+MANIFEST_VERSION = 1
+MANIFEST_NAME = ".bar-manifest.json"
+
+@functools.lru_cache(maxsize=None)
+def _renderer_hash() -> bytes:
+    # Any edit to this file or a different PyYAML/emitter invalidates every entry
+    with open(__file__, "rb") as f:
+        source = f.read()
+    return hashlib.sha256(source + yaml.__version__.encode() + _Dumper.__name__.encode()).digest()
+
+def entry_hash(entry: dict) -> str:
+    return hashlib.sha256(_renderer_hash() + json.dumps(entry, sort_keys=True).encode()).hexdigest()
+
+def app_key(entry: dict) -> str:
+    return f"{entry['namespace']}/{entry['app_name']}" if entry["namespace"] else entry["app_name"]
+
+def _read_manifest(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("apps", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _write_if_changed(path: str, data: bytes) -> bool:
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    _write_atomic(path, data)
+    return True
+
+def _write_manifest(path: str, apps: dict, previous: dict):
+    if apps != previous or not os.path.exists(path):
+        _write_atomic(path, json.dumps({"version": MANIFEST_VERSION, "apps": apps}, indent=1).encode())
+
+def _plan(entries: list, previous: dict, is_current) -> tuple:
+    """Split entries into (stale, report) against the previous manifest."""
+    report = {"added": [], "changed": [], "removed": [], "unchanged": 0, "written": 0}
+    stale = []
+    for entry in entries:
+        key = app_key(entry)
+        digest = entry_hash(entry)
+        old = previous.get(key)
+        if old is not None and old["input"] == digest and is_current(old):
+            report["unchanged"] += 1
+            continue
+        report["changed" if old is not None else "added"].append(key)
+        stale.append((key, digest, entry))
+    current = {app_key(entry) for entry in entries}
+    report["removed"] = [key for key in previous if key not in current]
+    return stale, report
+
+def regenerate_per_app(entries: list, out_dir: str, workers: int = None, force: bool = False) -> dict:
+    """Bring one <app>-deployment.yaml per app in out_dir up to date with the inventory."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    previous = _read_manifest(manifest_path)
+    stale, report = _plan(entries, previous,
+                          lambda old: not force and os.path.exists(os.path.join(out_dir, old["file"])))
+
+    apps = {key: previous[key] for key in map(app_key, entries) if key in previous}
+    for (key, digest, entry), (_, text) in zip(stale, render_inventory([entry for *_, entry in stale], workers)):
+        filename = output_filename(entry)
+        if _write_if_changed(os.path.join(out_dir, filename), text.encode("utf-8")):
+            report["written"] += 1
+        apps[key] = {"input": digest, "file": filename}
+
+    owned = {app["file"] for app in apps.values()}
+    for key in report["removed"]:
+        filename = previous[key].get("file")
+        if filename and filename not in owned:
+            try:
+                os.remove(os.path.join(out_dir, filename))
+            except FileNotFoundError:
+                pass
+
+    _write_manifest(manifest_path, apps, previous)
+    return report
+
+def regenerate_multi_document(entries: list, out_path: str, workers: int = None, force: bool = False) -> dict:
+    """Bring a multi-document YAML file up to date, reusing the bytes of unchanged documents."""
+    manifest_path = f"{out_path}.manifest.json"
+    previous = _read_manifest(manifest_path)
+    try:
+        size = os.path.getsize(out_path)
+    except OSError:
+        size = -1
+    # Documents are only reusable if the file still has the layout the manifest describes
+    if previous and size != sum(app["length"] for app in previous.values()):
+        previous = {}
+    stale, report = _plan(entries, previous, lambda old: not force)
+
+    order = [app_key(entry) for entry in entries]
+    if not stale and not report["removed"] and order == list(previous):
+        return report  # nothing to render and nothing moved
+
+    existing = b""
+    if len(stale) < len(entries):
+        with open(out_path, "rb") as f:
+            existing = f.read()
+    rendered = {key: (digest, ("---\n" + text).encode("utf-8"))
+                for (key, digest, _), (_, text) in zip(stale, render_inventory([entry for *_, entry in stale], workers))}
+
+    apps = {}
+    chunks = []
+    offset = 0
+    for key in order:
+        if key in rendered:
+            digest, data = rendered[key]
+        else:
+            old = previous[key]
+            digest, data = old["input"], existing[old["offset"]:old["offset"] + old["length"]]
+        chunks.append(data)
+        apps[key] = {"input": digest, "offset": offset, "length": len(data)}
+        offset += len(data)
+
+    if _write_if_changed(out_path, b"".join(chunks)):
+        report["written"] += 1
+    _write_manifest(manifest_path, apps, previous)
+    return report
+
 if __name__ == "__main__":
-    generate_kubernetes_deployment()
+    if len(sys.argv) == 1:
+        generate_kubernetes_deployment()
+        sys.exit(0)
+
+    parser = argparse.ArgumentParser(description="Render Kubernetes Deployments from an inventory file.")
+    parser.add_argument("inventory", help="CSV, YAML or JSONL inventory (no arguments: interactive mode)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--out", help="Multi-document YAML file ('-' for stdout)")
+    target.add_argument("--out-dir", help="Directory for one <app>-deployment.yaml per app")
+    parser.add_argument("--workers", type=int, default=None, help="Render processes for large inventories (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and re-render every app")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        entries = load_inventory(args.inventory)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"bar: {e}\n")
+
+    if args.out == "-":
+        count = write_multi_document(render_inventory(entries, args.workers), sys.stdout)
+        print(f"rendered {count} deployments", file=sys.stderr)
+        sys.exit(0)
+
+    if args.out_dir:
+        report = regenerate_per_app(entries, args.out_dir, args.workers, args.force)
+    else:
+        report = regenerate_multi_document(entries, args.out, args.workers, args.force)
+    for mark, label in (("+", "added"), ("~", "changed"), ("-", "removed")):
+        for key in report[label]:
+            print(f"{mark} {key}", file=sys.stderr)
+    print(f"{len(report['added'])} added, {len(report['changed'])} changed, {len(report['removed'])} removed, "
+          f"{report['unchanged']} unchanged; {report['written']} written in "
+          f"{(time.perf_counter() - start) * 1e3:.0f} ms", file=sys.stderr)
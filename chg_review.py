@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import jinja2
+from openai import (
+    AsyncAzureOpenAI, AsyncOpenAI, APIConnectionError, APIStatusError, APITimeoutError,
+    InternalServerError, RateLimitError,
+)
+
+# Nightly batch reviewer for CHGs, one prompts.jinja rendering per CHG. Reads
+# CHGs from JSONL, keeps at most CHG_CONCURRENCY completions in flight and
+# starts at most CHG_RATE per second, and appends each result to the output
+# as soon as it arrives. The output doubles as the checkpoint: a rerun skips
+# every CHG that already has a result without an error and retries the rest.
+# A retried CHG is appended, so until that run finishes the file can hold an
+# old error record and a newer one for the same id; the last record per id
+# wins, and a run that completes compacts the file to one record per id.
+#   STANDIN_LATENCY=0.2 uvicorn openai_standin:app --port 5100
+#   CHG_REVIEW_BASE_URL=http://localhost:5100/v1 python chg_review.py chgs.jsonl -o reviews.jsonl
+
+# ---- Model client ----
+# CHG_REVIEW_BASE_URL points at any OpenAI-compatible server (e.g. openai_standin.py);
+# otherwise the Azure settings shared with updatedlangrph.py are used
+CHG_REVIEW_BASE_URL = os.getenv("CHG_REVIEW_BASE_URL")
+deployment_name = os.getenv("AZURE_DEPLOYMENT_NAME", "gpt-4")
+
+# ---- Batch settings ----
+CHG_CONCURRENCY = int(os.getenv("CHG_CONCURRENCY", "16"))  # completions in flight
+CHG_RATE = float(os.getenv("CHG_RATE", "5"))  # completions started per second
+CHG_BURST = int(os.getenv("CHG_BURST", "10"))  # token bucket size
+CHG_MAX_RETRIES = int(os.getenv("CHG_MAX_RETRIES", "5"))
+CHG_BACKOFF_BASE = float(os.getenv("CHG_BACKOFF_BASE", "1.0"))  # seconds before the first retry
+CHG_BACKOFF_MAX = float(os.getenv("CHG_BACKOFF_MAX", "60"))
+CHG_TIMEOUT = float(os.getenv("CHG_TIMEOUT", "120"))  # seconds per completion
+TEMPLATE_PATH = os.getenv("CHG_TEMPLATE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "prompts.jinja"))
+
+RETRYABLE = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+def make_client():
+    # Retries are ours (with the rate limiter in the loop), so the SDK's are off
+    if CHG_REVIEW_BASE_URL:
+        return AsyncOpenAI(base_url=CHG_REVIEW_BASE_URL, api_key=os.getenv("OPENAI_API_KEY", "standin"),
+                           timeout=CHG_TIMEOUT, max_retries=0)
+    return AsyncAzureOpenAI(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        api_version=os.getenv("OPENAI_API_VERSION"),
+        azure_endpoint=os.getenv("OPENAI_API_BASE"),
+        timeout=CHG_TIMEOUT,
+        max_retries=0,
+    )
+
+# ---- Prompt ----
+def load_template(path: str = TEMPLATE_PATH) -> jinja2.Template:
+    """Compile the reviewer template once; an undefined variable is an error, not an empty string."""
+    env = jinja2.Environment(
+        loader=jinja2.FileSystemLoader(os.path.dirname(os.path.abspath(path))),
+        undefined=jinja2.StrictUndefined,
+        keep_trailing_newline=True,
+    )
+    return env.get_template(os.path.basename(path))
+
+def chg_id(record: dict) -> str:
+    for key in ("id", "number", "chg_id"):
+        if record.get(key) is not None:
+            return str(record[key])
+    raise ValueError("CHG record has no 'id', 'number' or 'chg_id'")
+
+def render_prompt(template: jinja2.Template, record: dict) -> str:
+    # A record may carry the CHG text under "chg"; otherwise the record itself is the CHG
+    chg = record.get("chg")
+    if chg is None:
+        chg = json.dumps(record, indent=2, ensure_ascii=False)
+    elif not isinstance(chg, str):
+        chg = json.dumps(chg, indent=2, ensure_ascii=False)
+    return template.render(chg=chg)
+
+def parse_review(content: str) -> dict:
+    text = (content or "").strip()
+    if text.startswith("```"):
+        # Strip a ```json ... ``` fence
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    review = json.loads(text)
+    if not isinstance(review, dict):
+        raise ValueError("review is not a JSON object")
+    return review
+
+def iter_chgs(path: str):
+    """Yield (line_no, record, problem) from a JSONL file of CHGs ('-' for stdin), lazily.
+
+    A line that is not a JSON object comes back with record None and a
+    problem message, so one bad line doesn't stop the run.
+    """
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with stream:
+        for line_no, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, f"expected a JSON object, got {type(record).__name__}"
+                continue
+            yield line_no, record, None
+
+# ---- Checkpoint ----
+def load_checkpoint(path: str) -> tuple:
+    """(ids reviewed without an error, ids whose last record is an error) in an existing output file."""
+    done = set()
+    errored = set()
+    try:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by a crash
+                if "id" not in result:
+                    continue
+                if "error" in result:
+                    errored.add(result["id"])
+                    done.discard(result["id"])
+                else:
+                    done.add(result["id"])
+                    errored.discard(result["id"])
+    except FileNotFoundError:
+        pass
+    return done, errored
+
+def compact_output(path: str):
+    """Rewrite the output with only the last record per id, in first-seen order."""
+    latest = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by a crash
+            latest[result.get("id")] = line if line.endswith("\n") else line + "\n"
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as out:
+        out.writelines(latest.values())
+    os.replace(tmp, path)
+
+def _open_output(path: str):
+    out = open(path, "a+", encoding="utf-8")
+    # Start on a fresh line if the last run died mid-write
+    if out.tell() > 0:
+        out.seek(out.tell() - 1)
+        if out.read(1) != "\n":
+            out.write("\n")
+    return out
+
+# ---- Rate limiting and retries ----
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:  # callers queue in order instead of all sleeping and racing
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def backoff_delay(attempt: int, error: Exception = None) -> float:
+    # Full jitter over an exponential ceiling; a server-sent Retry-After wins when present
+    if isinstance(error, APIStatusError):
+        retry_after = error.response.headers.get("retry-after")
+        try:
+            return min(CHG_BACKOFF_MAX, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(CHG_BACKOFF_MAX, CHG_BACKOFF_BASE * 2 ** attempt))
+
+async def complete(client, bucket: TokenBucket, prompt: str) -> tuple:
+    """(content, attempts) for one prompt, retrying transient failures with backoff."""
+    for attempt in range(CHG_MAX_RETRIES + 1):
+        await bucket.acquire()
+        try:
+            response = await client.chat.completions.create(
+                model=deployment_name,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0,
+            )
+            return response.choices[0].message.content, attempt + 1
+        except RETRYABLE as e:
+            if attempt == CHG_MAX_RETRIES:
+                raise
+            await asyncio.sleep(backoff_delay(attempt, e))
+
+# ---- Batch runner ----
+async def review_chg(client, bucket: TokenBucket, template: jinja2.Template, record: dict, out) -> dict:
+    result = {"id": chg_id(record)}
+    start = time.perf_counter()
+    try:
+        content, result["attempts"] = await complete(client, bucket, render_prompt(template, record))
+        try:
+            result["review"] = parse_review(content)
+        except ValueError as e:
+            result.update(error=f"unparseable review: {e}", raw=content)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    # One write per result from the event loop thread, so lines never interleave
+    out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    out.flush()
+    return result
+
+async def run_reviews(source: str, output: str, concurrency: int = CHG_CONCURRENCY, rate: float = CHG_RATE,
+                      burst: int = CHG_BURST, template_path: str = TEMPLATE_PATH, client=None) -> dict:
+    template = load_template(template_path)
+    done, errored = load_checkpoint(output)
+    bucket = TokenBucket(rate, burst)
+    slots = asyncio.Semaphore(concurrency)
+    pending = set()
+    summary = {"reviewed": 0, "failed": 0, "skipped": 0, "invalid": 0}
+
+    def finished(task: asyncio.Task):
+        pending.discard(task)
+        slots.release()
+        if not task.cancelled():
+            summary["failed" if "error" in task.result() else "reviewed"] += 1
+
+    start = time.perf_counter()
+    client = client or make_client()
+    try:
+        with _open_output(output) as out:
+            try:
+                for line_no, record, problem in iter_chgs(source):
+                    try:
+                        if problem:
+                            raise ValueError(problem)
+                        key = chg_id(record)
+                    except ValueError as e:
+                        print(f"chg_review: line {line_no}: {e}", file=sys.stderr)
+                        summary["invalid"] += 1
+                        continue
+                    if key in done:
+                        summary["skipped"] += 1
+                        continue
+                    done.add(key)  # a CHG listed twice is reviewed once
+                    # Reading stops here while every slot is busy, so memory stays flat on huge inputs
+                    await slots.acquire()
+                    task = asyncio.create_task(review_chg(client, bucket, template, record, out))
+                    pending.add(task)
+                    task.add_done_callback(finished)
+            finally:
+                # Even if the input breaks off, let completions in flight land in the output
+                if pending:
+                    await asyncio.wait(pending)
+    finally:
+        await client.close()
+
+    # Retried CHGs left their old error records behind; keep only the newest per id
+    if errored:
+        compact_output(output)
+    summary["seconds"] = round(time.perf_counter() - start, 2)
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Review CHGs from JSONL with the prompts.jinja reviewer.")
+    parser.add_argument("chgs", help="JSONL of CHG records with an 'id' ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Results JSONL, also the resume checkpoint; the last record per id wins")
+    parser.add_argument("--concurrency", type=int, default=CHG_CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=CHG_RATE, help="Completions started per second (0: unlimited)")
+    parser.add_argument("--burst", type=int, default=CHG_BURST)
+    parser.add_argument("--template", default=TEMPLATE_PATH)
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_reviews(args.chgs, args.output, args.concurrency, args.rate, args.burst, args.template))
+    print(json.dumps(summary), file=sys.stderr)
+    sys.exit(1 if summary["failed"] or summary["invalid"] else 0)
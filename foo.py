@@ -1,3 +1,17 @@
+import os
+import re
+import sys
+import time
+import argparse
+import json
+import pickle
+import struct
+import hashlib
+import functools
+import itertools
+import threading
+import joblib
+import sklearn
 import nltk
 from nltk.tokenize import word_tokenize
 from nltk.corpus import stopwords
@@ -6,9 +20,36 @@ from sklearn.naive_bayes import MultinomialNB
 from sklearn.pipeline import make_pipeline
 from datetime import datetime
 
-# Download necessary NLTK data
-nltk.download('punkt', quiet=True)
-nltk.download('stopwords', quiet=True)
+# ---- NLTK data ----
+# Checked on first use instead of downloading at import; with NLTK_OFFLINE set
+# a missing package raises straight away rather than trying the network.
+NLTK_OFFLINE = os.getenv("NLTK_OFFLINE", "").lower() in ("1", "true", "yes")
+FOO_TOKENIZER = os.getenv("FOO_TOKENIZER", "nltk")  # "nltk" (word_tokenize) or "regex" (faster approximation)
+INTENT_THRESHOLD = float(os.getenv("FOO_INTENT_THRESHOLD", "0"))  # below this confidence the intent is "unknown"
+CLASSIFY_CHUNK_SIZE = int(os.getenv("FOO_CLASSIFY_CHUNK_SIZE", "5000"))
+MODEL_PATH = os.getenv("FOO_MODEL_PATH", "foo_model.joblib")
+
+# word_tokenize reads punkt_tab from NLTK 3.8.2 on, punkt before that
+_PUNKT = "punkt_tab" if hasattr(nltk.tokenize, "PunktTokenizer") else "punkt"
+NLTK_RESOURCES = {
+    "stopwords": "corpora/stopwords",
+    "punkt": "tokenizers/punkt",
+    "punkt_tab": "tokenizers/punkt_tab",
+}
+
+def ensure_nltk_data(*packages):
+    for package in packages:
+        try:
+            nltk.data.find(NLTK_RESOURCES[package])
+            continue
+        except LookupError:
+            pass
+        if NLTK_OFFLINE or not nltk.download(package, quiet=True):
+            raise LookupError(
+                f"NLTK data '{package}' is not installed"
+                f"{' (NLTK_OFFLINE is set)' if NLTK_OFFLINE else ' and the download failed'}; "
+                f"install it with: python -m nltk.downloader {package}"
+            )
 
 # Sample training data
 training_data = [
@@ -20,14 +61,95 @@ training_data = [
     ("What's the weather like?", "weather"),
 ]
 
-# Separate texts and labels
-texts, labels = zip(*training_data)
+# ---- Model artifact ----
+# Trained by `foo.py --train` and loaded on first prediction, so importing
+# foo.py or starting a worker costs nothing until a message arrives.
+MODEL_FORMAT_VERSION = 1
+
+def load_training_data(path: str) -> list:
+    """(text, intent) pairs from a JSONL file of {"text": ..., "intent": ...} records."""
+    with open(path, encoding="utf-8") as f:
+        records = (json.loads(line) for line in f if line.strip())
+        return [(record["text"], record["intent"]) for record in records]
+
+def training_hash(data) -> str:
+    return hashlib.sha256(json.dumps(sorted(data)).encode()).hexdigest()
+
+def train_model(data=training_data):
+    # Separate texts and labels
+    texts, labels = zip(*data)
+
+    # Create a pipeline with TF-IDF vectorizer and Naive Bayes classifier
+    pipeline = make_pipeline(TfidfVectorizer(), MultinomialNB())
+    pipeline.fit(texts, labels)
+    return pipeline
+
+def save_model(pipeline, path: str = MODEL_PATH, data=training_data):
+    artifact = {
+        "format_version": MODEL_FORMAT_VERSION,
+        "sklearn_version": sklearn.__version__,
+        "training_hash": training_hash(data),
+        "model": pipeline,
+    }
+    tmp = f"{path}.tmp"
+    joblib.dump(artifact, tmp)  # uncompressed, so arrays can be memory-mapped on load
+    os.replace(tmp, path)
 
-# Create a pipeline with TF-IDF vectorizer and Naive Bayes classifier
-model = make_pipeline(TfidfVectorizer(), MultinomialNB())
+def read_artifact(path: str = MODEL_PATH, mmap: bool = True) -> dict:
+    """Load an artifact and check it was written by this format and scikit-learn version.
 
-# Train the model
-model.fit(texts, labels)
+    Raises FileNotFoundError if it is missing and ValueError if it is unusable.
+    """
+    try:
+        artifact = joblib.load(path, mmap_mode="r" if mmap else None)
+    except (EOFError, pickle.UnpicklingError, struct.error, IndexError, KeyError) as e:
+        # Truncated or corrupt file
+        raise ValueError(f"{path}: unreadable model artifact ({type(e).__name__}: {e})") from e
+    version = artifact.get("format_version") if isinstance(artifact, dict) else None
+    if version != MODEL_FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported model format {version}")
+    if artifact.get("sklearn_version") != sklearn.__version__:
+        raise ValueError(f"{path}: trained with scikit-learn {artifact.get('sklearn_version')}, "
+                         f"running {sklearn.__version__}")
+    return artifact
+
+def train_command(path: str = MODEL_PATH, data=training_data, force: bool = False) -> str:
+    """Train and save the model unless a valid artifact is already there; returns a status line."""
+    if not force:
+        try:
+            artifact = read_artifact(path, mmap=False)
+        except (FileNotFoundError, ValueError):
+            pass
+        else:
+            stale = artifact["training_hash"] != training_hash(data)
+            raise FileExistsError(
+                f"{path} is a valid model artifact"
+                f"{' but the training data has changed' if stale else ''}; pass --force to retrain"
+            )
+    save_model(train_model(data), path, data)
+    return f"trained on {len(data)} examples -> {path}"
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """The intent pipeline, loaded from MODEL_PATH on first use.
+
+    Without a usable artifact it is trained in memory from training_data, with
+    a warning, so the chatbot still runs before `--train` has been done.
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    artifact = read_artifact(MODEL_PATH)
+                except (FileNotFoundError, ValueError) as e:
+                    print(f"foo: {e}; training in memory (run foo.py --train to save a model)", file=sys.stderr)
+                    _model = train_model()
+                else:
+                    _model = artifact["model"]
+    return _model
 
 def respond_greeting():
     return "Hello! How can I help you today?"
@@ -60,12 +182,151 @@ responses = {
     "weather": respond_weather
 }
 
-def preprocess_text(text):
+# ---- Preprocessing ----
+# An approximation of word_tokenize, not an equivalent: it matches on
+# words, "n't" ("don't" -> do n't), "'s"-style clitics and single
+# punctuation marks. It splits numbers like "3.5", hyphenated words and
+# abbreviations like "e.g." where word_tokenize keeps them whole, and it
+# leaves quotes as '"'. A model trained through one tokenizer should be
+# served through the same one.
+_TOKEN = re.compile(r"\w+(?=n't\b)|n't\b|\w+|'\w+|[^\w\s]")
+
+@functools.lru_cache(maxsize=None)
+def stop_words() -> frozenset:
+    ensure_nltk_data("stopwords")
+    return frozenset(stopwords.words('english'))
+
+def regex_tokenize(text):
+    return _TOKEN.findall(text)
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(name: str = FOO_TOKENIZER):
+    if name == "regex":
+        return regex_tokenize
+    if name == "nltk":
+        ensure_nltk_data(_PUNKT)
+        return word_tokenize
+    raise ValueError(f"unknown tokenizer {name!r}; expected 'nltk' or 'regex'")
+
+def preprocess_text(text, tokenizer: str = FOO_TOKENIZER):
     # Tokenize and remove stopwords
+    tokens = get_tokenizer(tokenizer)(text.lower())
+    stop = stop_words()
+    return ' '.join([word for word in tokens if word not in stop])
+
+# ---- Batch classification ----
+UNKNOWN_INTENT = "unknown"
+
+def classify_batch(texts, threshold: float = INTENT_THRESHOLD, tokenizer: str = FOO_TOKENIZER) -> list:
+    """(intent, confidence) per text, from one TF-IDF transform and predict_proba call per batch.
+
+    Texts that preprocess to the same string are scored once. An intent whose
+    probability is below `threshold` comes back as UNKNOWN_INTENT.
+    """
+    processed = [preprocess_text(text, tokenizer) for text in texts]
+    if not processed:
+        return []
+    unique = list(dict.fromkeys(processed))
+    model = get_model()
+    proba = model.predict_proba(unique)
+    best = proba.argmax(axis=1)
+    scored = {}
+    for text, index, row in zip(unique, best, proba):
+        confidence = float(row[index])
+        intent = model.classes_[index] if confidence >= threshold else UNKNOWN_INTENT
+        scored[text] = (str(intent), confidence)
+    return [scored[text] for text in processed]
+
+def _parse_records(lines):
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, f"expected a JSON object, got {type(record).__name__}"
+            continue
+        yield line_no, record, None
+
+def classify_jsonl(lines, out, field: str = "text", chunk_size: int = CLASSIFY_CHUNK_SIZE,
+                   threshold: float = INTENT_THRESHOLD) -> tuple:
+    """Classify JSONL records `chunk_size` at a time, writing each back with intent and confidence.
+
+    A line that isn't a JSON object is written as {"line": n, "error": ...} in
+    its place and the run carries on. Returns (records classified, lines
+    rejected); blank lines are skipped.
+    """
+    parsed = _parse_records(lines)
+    classified = rejected = 0
+    while True:
+        chunk = list(itertools.islice(parsed, chunk_size))
+        if not chunk:
+            return classified, rejected
+        records = [record for _, record, _ in chunk if record is not None]
+        results = iter(classify_batch([str(record.get(field, "")) for record in records], threshold))
+        lines_out = []
+        for line_no, record, error in chunk:
+            if error is not None:
+                lines_out.append(json.dumps({"line": line_no, "error": error}) + "\n")
+                rejected += 1
+                continue
+            intent, confidence = next(results)
+            lines_out.append(json.dumps({**record, "intent": intent, "confidence": round(confidence, 4)}) + "\n")
+            classified += 1
+        out.writelines(lines_out)
+
+# ---- Benchmark ----
+def _preprocess_text_legacy(text):
+    # The original implementation, kept as the benchmark baseline
     tokens = word_tokenize(text.lower())
     stop_words = set(stopwords.words('english'))
     return ' '.join([word for word in tokens if word not in stop_words])
 
+BENCH_MESSAGES = [
+    "How are you doing today?",
+    "What's your name, by the way?",
+    "Could you tell me what time it is in London right now?",
+    "Goodbye, and thanks for all the help!",
+    "Tell me a joke about computers, please.",
+    "What's the weather like this weekend? I'm planning a hike.",
+]
+
+def _latencies(preprocess, messages, repeat):
+    samples = []
+    for _ in range(repeat):
+        for message in messages:
+            start = time.perf_counter()
+            preprocess(message)
+            samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples
+
+def benchmark(repeat: int = 200) -> dict:
+    """Per-message preprocessing latency (seconds) for each available implementation."""
+    candidates = {
+        "legacy": (_preprocess_text_legacy, ("stopwords", _PUNKT)),
+        "nltk": (functools.partial(preprocess_text, tokenizer="nltk"), ("stopwords", _PUNKT)),
+        "regex": (functools.partial(preprocess_text, tokenizer="regex"), ("stopwords",)),
+    }
+    results = {}
+    for label, (preprocess, packages) in candidates.items():
+        try:
+            ensure_nltk_data(*packages)
+            preprocess(BENCH_MESSAGES[0])  # warm caches
+        except LookupError as e:
+            results[label] = {"error": str(e)}
+            continue
+        samples = _latencies(preprocess, BENCH_MESSAGES, repeat)
+        results[label] = {
+            "mean": sum(samples) / len(samples),
+            "p50": samples[len(samples) // 2],
+            "p99": samples[int(len(samples) * 0.99)],
+        }
+    return results
+
 def chat():
     print("SimpleAI: Hello! How can I help you? (Type 'quit' to exit)")
     while True:
@@ -75,8 +336,7 @@ def chat():
             break
         
         # Preprocess and predict intent
-        processed_input = preprocess_text(user_input)
-        intent = model.predict([processed_input])[0]
+        intent, _ = classify_batch([user_input])[0]
         
         # Generate and print response
         response_func = responses.get(intent, respond_unknown)
@@ -84,4 +344,44 @@ def chat():
 
 # Start the conversation
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SimpleAI intent chatbot.")
+    parser.add_argument("--bench", action="store_true", help="Report per-message preprocessing latency and exit")
+    parser.add_argument("--repeat", type=int, default=200, help="Passes over the benchmark messages")
+    parser.add_argument("--classify", metavar="JSONL", help="Classify logged messages ('-' for stdin) and exit")
+    parser.add_argument("--output", default="-", help="Where --classify writes records (default: stdout)")
+    parser.add_argument("--field", default="text", help="Record field holding the message text")
+    parser.add_argument("--chunk-size", type=int, default=CLASSIFY_CHUNK_SIZE, help="Records per predict call")
+    parser.add_argument("--threshold", type=float, default=INTENT_THRESHOLD,
+                        help="Minimum confidence before falling back to the unknown intent")
+    parser.add_argument("--train", action="store_true", help="Train and save the model artifact, then exit")
+    parser.add_argument("--force", action="store_true", help="With --train, overwrite a valid artifact")
+    parser.add_argument("--data", help="With --train, JSONL training examples (default: built-in samples)")
+    parser.add_argument("--model", default=MODEL_PATH, help="Model artifact path (default: FOO_MODEL_PATH)")
+    args = parser.parse_args()
+    MODEL_PATH = args.model
+
+    if args.train:
+        data = load_training_data(args.data) if args.data else training_data
+        try:
+            print(train_command(args.model, data, args.force))
+        except FileExistsError as e:
+            parser.exit(1, f"foo: {e}\n")
+        sys.exit(0)
+
+    if args.classify:
+        source = sys.stdin if args.classify == "-" else open(args.classify, encoding="utf-8")
+        out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+        with source, out:
+            count, rejected = classify_jsonl(source, out, args.field, args.chunk_size, args.threshold)
+        print(f"classified {count} records, rejected {rejected} lines", file=sys.stderr)
+        sys.exit(1 if rejected else 0)
+
+    if args.bench:
+        for label, result in benchmark(args.repeat).items():
+            if "error" in result:
+                print(f"{label:7} unavailable: {result['error']}")
+                continue
+            print(f"{label:7} mean {result['mean'] * 1e6:8.1f} us  p50 {result['p50'] * 1e6:8.1f} us  "
+                  f"p99 {result['p99'] * 1e6:8.1f} us")
+        sys.exit(0)
     chat()
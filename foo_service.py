@@ -0,0 +1,164 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from pydantic import BaseModel
+import httpx
+import foo
+
+# HTTP front end for the foo.py intent classifier. Concurrent requests are
+# collected for up to FOO_BATCH_WINDOW seconds and scored with one
+# classify_batch call on a worker thread, so the event loop never blocks on
+# sklearn and the per-call pipeline overhead is paid once per batch:
+#   uvicorn foo_service:app --port 8100
+#   python foo_service.py bench --requests 20000 --concurrency 200
+FOO_BATCH_WINDOW = float(os.getenv("FOO_BATCH_WINDOW", "0.005"))  # seconds; 0 takes whatever is already queued
+FOO_BATCH_MAX = int(os.getenv("FOO_BATCH_MAX", "256"))  # texts per predict call
+
+class MicroBatcher:
+    def __init__(self, window: float = FOO_BATCH_WINDOW, max_size: int = FOO_BATCH_MAX):
+        self.window = window
+        self.max_size = max_size
+        self._queue = asyncio.Queue()
+        self._task = None
+        self.requests = 0
+        self.batches = 0
+        self.largest_batch = 0
+
+    async def start(self):
+        # Load the model before the first request instead of inside it
+        await asyncio.to_thread(foo.get_model)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("classifier is shutting down"))
+
+    async def classify(self, text: str) -> tuple:
+        """(intent, confidence) for one message, scored alongside whatever else arrives in the window."""
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if self.window and self._queue.qsize() < self.max_size - 1:
+                await asyncio.sleep(self.window)
+            while len(batch) < self.max_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            try:
+                results = await asyncio.to_thread(foo.classify_batch, [text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():  # the caller may have gone away
+                    future.set_result(result)
+            self.requests += len(batch)
+            self.batches += 1
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch": self.requests / self.batches if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize(),
+        }
+
+batcher = MicroBatcher()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await batcher.start()
+    yield
+    await batcher.stop()
+
+app = FastAPI(lifespan=lifespan)
+
+class ChatRequest(BaseModel):
+    message: str
+
+@app.post("/chat")
+async def chat(request: ChatRequest):
+    intent, confidence = await batcher.classify(request.message)
+    response_func = foo.responses.get(intent, foo.respond_unknown)
+    return {"intent": intent, "confidence": round(confidence, 4), "response": response_func()}
+
+@app.get("/metrics")
+async def metrics():
+    return batcher.stats()
+
+# ---- Load generator ----
+async def run_load(client: httpx.AsyncClient, requests: int, concurrency: int) -> dict:
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            message = foo.BENCH_MESSAGES[i % len(foo.BENCH_MESSAGES)]
+            start = time.perf_counter()
+            response = await client.post("/chat", json={"message": message})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": requests,
+        "throughput": requests / elapsed,
+        "p50": latencies[len(latencies) // 2],
+        "p99": latencies[int(len(latencies) * 0.99)],
+    }
+
+async def benchmark(requests: int, concurrency: int, url: str = None) -> dict:
+    """Drive /chat at `url`, or in-process with and without batching when no url is given."""
+    if url:
+        async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+            return {"remote": await run_load(client, requests, concurrency)}
+
+    global batcher
+    results = {}
+    for label, window, max_size in (("unbatched", 0, 1), ("batched", FOO_BATCH_WINDOW, FOO_BATCH_MAX)):
+        batcher = MicroBatcher(window, max_size)
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://foo", timeout=30) as client:
+                results[label] = {**await run_load(client, requests, concurrency), **batcher.stats()}
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Intent classification service for foo.py.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench", help="Report /chat throughput and latency under concurrent load")
+    bench.add_argument("--requests", type=int, default=10000)
+    bench.add_argument("--concurrency", type=int, default=100)
+    bench.add_argument("--url", help="A running service (default: in-process, batched vs unbatched)")
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        for label, result in asyncio.run(benchmark(args.requests, args.concurrency, args.url)).items():
+            batches = f"  mean batch {result['mean_batch']:.1f}" if "mean_batch" in result else ""
+            print(f"{label:10} {result['throughput']:8.0f} req/s  p50 {result['p50'] * 1e3:7.2f} ms  "
+                  f"p99 {result['p99'] * 1e3:7.2f} ms{batches}")
+        sys.exit(0)
@@ -1,9 +1,13 @@
 import os
+import sys
 import json
 import yaml
+import argparse
+from multiprocessing import Pool
 from typing import TypedDict, Optional
 from langgraph.graph import StateGraph, END
 from openai import AzureOpenAI
+from schemavalidator import ValidationError, compile_schema, validator_for
 
 # ---- Azure OpenAI setup ----
 client = AzureOpenAI(
@@ -82,25 +86,11 @@ def ask_field(state: ConfigState) -> str:
 
 # ---- Input Parser & Validator ----
 def parse_input(user_input: str, field: str) -> Optional[any]:
-    meta = schema[field]
-    field_type = meta["type"]
-
     try:
-        if "enum" in meta:
-            if user_input not in meta["enum"]:
-                raise ValueError("Invalid choice")
-            return user_input
-        elif field_type == "string":
-            return str(user_input)
-        elif field_type == "integer":
-            return int(user_input)
-        elif field_type == "boolean":
-            return user_input.lower() in ["true", "yes", "1"]
-    except:
+        return validator_for(schema[field]).coerce(user_input)
+    except ValidationError:
         return None
 
-    return None
-
 # ---- Store Input ----
 def store_response(state: ConfigState, user_input: str) -> ConfigState:
     field = state["current_field"]
@@ -200,6 +190,143 @@ def run_agent(partial_config: Optional[dict] = None):
     state = apply_defaults(state)
     output_config(state["config"])
 
+# ---- Batch Mode ----
+def _read_config_file(file_path: str):
+    with open(file_path) as f:
+        if file_path.endswith(".json"):
+            return json.load(f)
+        return yaml.safe_load(f) or {}
+
+def iter_partial_configs(source: str):
+    """Yield (record_id, partial_config, error) from JSONL (file or '-') or a directory of JSON/YAML files.
+
+    A record that can't be read or isn't a mapping comes back as (record_id, None, message).
+    """
+    def checked(record_id, config):
+        if not isinstance(config, dict):
+            return record_id, None, f"expected a mapping, got {type(config).__name__}"
+        return record_id, config, None
+
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.endswith((".json", ".yaml", ".yml")):
+                continue
+            try:
+                config = _read_config_file(os.path.join(source, name))
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                yield name, None, f"{type(e).__name__}: {e}"
+                continue
+            yield checked(name, config)
+        return
+
+    f = sys.stdin if source == "-" else open(source)
+    try:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record_id = f"{source}:{line_no}"
+            try:
+                config = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield record_id, None, f"invalid JSON: {e}"
+                continue
+            yield checked(record_id, config)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+# Compiled once for batch validation of filled configs
+config_validator = compile_schema(schema)
+
+def headless_value(field: str, use_llm: bool = False):
+    """Value to fill in without a user: default, then a single or first enum choice, then the LLM."""
+    meta = schema[field]
+    if "default" in meta:
+        return meta["default"]
+    if not meta.get("required", False):
+        return None
+    if meta.get("enum"):
+        return meta["enum"][0]
+    if use_llm:
+        return parse_input(get_llm_suggestion(field), field)
+    return None
+
+def fill_config_headless(partial_config: Optional[dict], use_llm: bool = False) -> dict:
+    # The compiled graph can't run headlessly here: its ask_field node returns
+    # a prompt string rather than state. So this drives the pick_next_field
+    # node directly, in the same required-first order, and stores values the
+    # way store_response does.
+    state: ConfigState = {
+        "config": partial_config if partial_config else {},
+        "current_field": None
+    }
+    missing = []
+    assumed = []  # required fields filled from an enum choice or the LLM rather than a default
+    skipped = set()
+
+    while True:
+        # Fields that got no value count as filled, so pick_next_field moves past them
+        probe = pick_next_field({"config": {**state["config"], **dict.fromkeys(skipped)}, "current_field": None})
+        field = probe["current_field"]
+        if not field:
+            break
+
+        value = headless_value(field, use_llm)
+        if value is not None:
+            state["config"][field] = value
+            if "default" not in schema[field]:
+                assumed.append(field)
+        else:
+            if schema[field].get("required", False):
+                missing.append(field)
+            skipped.add(field)
+
+    coerced, issues = config_validator(state["config"])
+    if coerced is not None:
+        state["config"] = coerced
+    errors = [issue._asdict() for issue in issues if issue.path not in missing]
+    return {"config": state["config"], "missing": missing, "assumed": assumed, "errors": errors}
+
+def _fill_record(args):
+    record_id, partial_config, error, use_llm = args
+    if error is None:
+        try:
+            result = fill_config_headless(partial_config, use_llm)
+        except Exception as e:  # one bad record must not take down the batch
+            error = f"{type(e).__name__}: {e}"
+    if error is not None:
+        return {"id": record_id, "status": "error", "error": error}
+    complete = not result["missing"] and not result["errors"]
+    return {"id": record_id, "status": "complete" if complete else "incomplete", "complete": complete, **result}
+
+def run_batch(source: str, output: str = "-", workers: Optional[int] = None, use_llm: bool = False) -> dict:
+    """Fill every partial config from `source` across a process pool, writing JSONL reports."""
+    tasks = ((record_id, config, error, use_llm) for record_id, config, error in iter_partial_configs(source))
+    summary = {"records": 0, "complete": 0, "incomplete": 0, "error": 0}
+
+    out = sys.stdout if output == "-" else open(output, "w")
+    try:
+        with Pool(processes=workers) as pool:
+            for report in pool.imap(_fill_record, tasks, chunksize=16):
+                out.write(json.dumps(report) + "\n")
+                summary["records"] += 1
+                summary[report["status"]] += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return summary
+
 # ---- Start It ----
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill configs against the schema.")
+    parser.add_argument("--batch", metavar="SOURCE", help="JSONL file ('-' for stdin) or directory of JSON/YAML configs")
+    parser.add_argument("--output", default="-", help="JSONL report path (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--llm", action="store_true", help="Ask the LLM for required fields with no default")
+    args = parser.parse_args()
+
+    if args.batch:
+        summary = run_batch(args.batch, args.output, args.workers, args.llm)
+        print(json.dumps(summary), file=sys.stderr)
+        sys.exit(0 if summary["incomplete"] == 0 and summary["error"] == 0 else 1)
     run_agent()
\ No newline at end of file
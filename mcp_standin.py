@@ -0,0 +1,30 @@
+import os
+import asyncio
+from fastapi import FastAPI, Request
+from sse_starlette.sse import EventSourceResponse
+
+# Local stand-in for an MCP SSE server, for exercising alpha.py without the
+# real backends:
+#   STANDIN_NAME=a uvicorn mcp_standin:app --port 5001
+#   MCP_SERVER_A=http://localhost:5001/sse uvicorn alpha:app --port 8000
+STANDIN_NAME = os.getenv("STANDIN_NAME", "standin")
+STANDIN_INTERVAL = float(os.getenv("STANDIN_INTERVAL", "1.0"))  # seconds between events; 0 = as fast as possible
+STANDIN_LINES = int(os.getenv("STANDIN_LINES", "1"))  # data lines per event
+
+app = FastAPI()
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "name": STANDIN_NAME}
+
+@app.get("/sse")
+async def sse(request: Request):
+    async def event_generator():
+        seq = 0
+        while True:
+            seq += 1
+            data = "\n".join(f"{STANDIN_NAME} tick {seq} line {i}" for i in range(STANDIN_LINES))
+            yield {"event": "tick", "id": str(seq), "data": data}
+            await asyncio.sleep(STANDIN_INTERVAL)
+
+    return EventSourceResponse(event_generator())
@@ -0,0 +1,62 @@
+import os
+import json
+import time
+import random
+import asyncio
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Local stand-in for an OpenAI-compatible chat completions endpoint, for
+# exercising chg_review.py without the real model:
+#   STANDIN_LATENCY=0.2 STANDIN_FAIL_RATE=0.1 uvicorn openai_standin:app --port 5100
+#   CHG_REVIEW_BASE_URL=http://localhost:5100/v1 python chg_review.py chgs.jsonl -o reviews.jsonl
+STANDIN_LATENCY = float(os.getenv("STANDIN_LATENCY", "0.2"))  # seconds per completion
+STANDIN_FAIL_RATE = float(os.getenv("STANDIN_FAIL_RATE", "0"))  # share of requests answered 429 or 500
+
+app = FastAPI()
+calls = {"total": 0, "failed": 0, "in_flight": 0, "max_in_flight": 0}
+
+def _review(prompt: str) -> dict:
+    # Deterministic per prompt, so reruns can be compared
+    rng = random.Random(prompt)
+    checks = ["rollback", "validation", "window", "buddy", "approvals", "risk"]
+    failed = rng.sample(checks, rng.randint(0, 2))
+    return {
+        "score": 100 - 15 * len(failed),
+        "passed": [check for check in checks if check not in failed],
+        "failed": failed,
+        "suggestions": [f"Fix the {check} section" for check in failed],
+    }
+
+@app.get("/stats")
+async def stats():
+    return calls
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    calls["total"] += 1
+    calls["in_flight"] += 1
+    calls["max_in_flight"] = max(calls["max_in_flight"], calls["in_flight"])
+    try:
+        await asyncio.sleep(STANDIN_LATENCY)
+        if random.random() < STANDIN_FAIL_RATE:
+            calls["failed"] += 1
+            if random.random() < 0.5:
+                return JSONResponse({"error": {"message": "rate limited"}}, status_code=429, headers={"retry-after": "0.1"})
+            return JSONResponse({"error": {"message": "internal error"}}, status_code=500)
+        prompt = body["messages"][-1]["content"]
+        return {
+            "id": f"chatcmpl-standin-{calls['total']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "standin"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "```json\n" + json.dumps(_review(prompt)) + "\n```"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 50, "total_tokens": len(prompt) // 4 + 50},
+        }
+    finally:
+        calls["in_flight"] -= 1
@@ -0,0 +1,289 @@
+import re
+import sys
+import json
+import argparse
+from typing import Any, Callable, NamedTuple, Optional
+
+# Compiles a normalized config schema (field name -> {"type", "required",
+# "enum", "properties", "items", ...}, as written in langraph.py and
+# updatedlangrph.py or produced by normalize_openapi_schema) into a tree of
+# coercer closures. Each coercer is built once per schema node, so validating
+# a value is a few dict lookups and calls instead of re-reading the meta.
+
+class Issue(NamedTuple):
+    path: str
+    message: str
+
+class ValidationError(ValueError):
+    def __init__(self, issues: list):
+        self.issues = issues
+        super().__init__("; ".join(f"{issue.path or '<root>'}: {issue.message}" for issue in issues))
+
+# Returned by a coercer after it has recorded an issue
+INVALID = object()
+
+TRUE_VALUES = frozenset(["true", "yes", "y", "1", "on"])
+FALSE_VALUES = frozenset(["false", "no", "n", "0", "off"])
+
+Coercer = Callable[[Any, str, list], Any]  # (value, path, issues) -> coerced value or INVALID
+
+def _join(path: str, key) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+# ---- Scalar coercers ----
+def _coerce_string(value, path, issues):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    issues.append(Issue(path, f"expected string, got {type(value).__name__}"))
+    return INVALID
+
+def _coerce_integer(value, path, issues):
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    issues.append(Issue(path, f"expected integer, got {value!r}"))
+    return INVALID
+
+def _coerce_number(value, path, issues):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    issues.append(Issue(path, f"expected number, got {value!r}"))
+    return INVALID
+
+def _coerce_boolean(value, path, issues):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in TRUE_VALUES:
+            return True
+        if lowered in FALSE_VALUES:
+            return False
+    issues.append(Issue(path, f"expected boolean, got {value!r}"))
+    return INVALID
+
+def _coerce_any(value, path, issues):
+    return value
+
+_SCALARS = {
+    "string": _coerce_string,
+    "integer": _coerce_integer,
+    "number": _coerce_number,
+    "boolean": _coerce_boolean,
+    "any": _coerce_any,
+}
+
+# ---- Compiler ----
+def _compile_field(meta: dict, memo: dict) -> Coercer:
+    field_type = meta.get("type", "string")
+
+    if field_type == "object":
+        # Raw OpenAPI nodes (e.g. un-normalized array items) list required names
+        required = meta.get("required")
+        coerce = _compile_object(meta.get("properties", {}), memo,
+                                 required_names=required if isinstance(required, list) else ())
+    elif field_type == "array":
+        coerce = _compile_array(meta.get("items") or {"type": "string"}, memo)
+    else:
+        coerce = _SCALARS.get(field_type, _coerce_any)
+
+    if "enum" in meta:
+        coerce = _with_enum(coerce, meta["enum"])
+    return coerce
+
+def _with_enum(coerce: Coercer, enum_values) -> Coercer:
+    allowed = frozenset(enum_values)
+    choices = ", ".join(str(v) for v in enum_values)
+
+    def coerce_enum(value, path, issues):
+        value = coerce(value, path, issues)
+        if value is INVALID:
+            return INVALID
+        try:
+            if value in allowed:
+                return value
+        except TypeError:  # unhashable
+            pass
+        issues.append(Issue(path, f"{value!r} is not one of: {choices}"))
+        return INVALID
+
+    return coerce_enum
+
+def _compile_array(items_meta: dict, memo: dict) -> Coercer:
+    coerce_item = _compile_field(items_meta, memo)
+
+    def coerce_array(value, path, issues):
+        if isinstance(value, str):
+            value = [item.strip() for item in value.split(",")]
+        elif not isinstance(value, list):
+            issues.append(Issue(path, f"expected array, got {type(value).__name__}"))
+            return INVALID
+
+        result = []
+        ok = True
+        for i, item in enumerate(value):
+            item = coerce_item(item, _join(path, i), issues)
+            ok = ok and item is not INVALID
+            result.append(item)
+        return result if ok else INVALID
+
+    return coerce_array
+
+def _compile_object(properties: dict, memo: dict, pattern_properties: Optional[dict] = None,
+                    matcher=None, required_names=()) -> Coercer:
+    key = id(properties)
+    if key in memo:
+        return memo[key][1]
+
+    # Filled after registration so recursive schemas compile to a cycle
+    fields = []
+    patterns = []
+
+    def coerce_object(value, path, issues):
+        if not isinstance(value, dict):
+            issues.append(Issue(path, f"expected object, got {type(value).__name__}"))
+            return INVALID
+
+        result = {}
+        ok = True
+        for name, required, coerce in fields:
+            if name not in value:
+                if required:
+                    issues.append(Issue(_join(path, name), "required field missing"))
+                    ok = False
+                continue
+            coerced = coerce(value[name], _join(path, name), issues)
+            ok = ok and coerced is not INVALID
+            result[name] = coerced
+
+        for name, item in value.items():
+            if name in result or name in known:
+                continue
+            coerce = match_pattern(name) if patterns else None
+            if coerce is None:
+                result[name] = item
+                continue
+            coerced = coerce(item, _join(path, name), issues)
+            ok = ok and coerced is not INVALID
+            result[name] = coerced
+
+        return result if ok else INVALID
+
+    def match_pattern(name):
+        if matcher is not None:
+            pattern = matcher.match(name)
+            return pattern_coercers.get(pattern)
+        for compiled, coerce in patterns:
+            if compiled.match(name):
+                return coerce
+        return None
+
+    memo[key] = (properties, coerce_object)
+    known = frozenset(name for name in properties if not name.startswith("__"))
+    for name, meta in properties.items():
+        if not name.startswith("__"):
+            required = meta.get("required") is True or name in required_names
+            fields.append((name, required, _compile_field(meta, memo)))
+
+    pattern_coercers = {}
+    for pattern, meta in (pattern_properties or {}).items():
+        coerce = _compile_field(meta, memo)
+        pattern_coercers[pattern] = coerce
+        patterns.append((re.compile(pattern), coerce))
+
+    return coerce_object
+
+class Validator:
+    """A compiled schema node.
+
+    Calling it returns (coerced_value, issues); coerce() returns the value or
+    raises ValidationError listing every issue with its path.
+    """
+
+    def __init__(self, coerce: Coercer):
+        self._coerce = coerce
+
+    def __call__(self, value) -> tuple:
+        issues = []
+        coerced = self._coerce(value, "", issues)
+        return (None if coerced is INVALID else coerced), issues
+
+    def coerce(self, value):
+        coerced, issues = self(value)
+        if issues:
+            raise ValidationError(issues)
+        return coerced
+
+def compile_schema(schema: dict) -> Validator:
+    """Compile a whole normalized schema (top-level fields) into a config validator."""
+    coerce = _compile_object(
+        schema, {},
+        pattern_properties=schema.get("__patternProperties__"),
+        matcher=schema.get("__patternMatcher__"),
+    )
+    return Validator(coerce)
+
+def compile_field(meta: dict) -> Validator:
+    return Validator(_compile_field(meta, {}))
+
+_field_validators = {}
+
+def validator_for(meta: dict) -> Validator:
+    """compile_field, cached on the identity of the meta dict."""
+    cached = _field_validators.get(id(meta))
+    if cached is None or cached[0] is not meta:
+        cached = _field_validators[id(meta)] = (meta, compile_field(meta))
+    return cached[1]
+
+def validate_jsonl(lines, validator: Validator):
+    """Yield (line_no, coerced, issues) for each non-blank JSONL line."""
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, None, [Issue("", f"invalid JSON: {e}")]
+            continue
+        coerced, issues = validator(record)
+        yield line_no, coerced, issues
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate JSONL configs against a normalized schema.")
+    parser.add_argument("schema", help="Normalized schema (JSON/YAML), or an OpenAPI spec with --component")
+    parser.add_argument("configs", nargs="?", default="-", help="JSONL configs (default: stdin)")
+    parser.add_argument("--component", help="Schema name under components.schemas of an OpenAPI spec")
+    args = parser.parse_args()
+
+    if args.component:
+        from apispecload import load_normalized_schema
+        _, schema = load_normalized_schema(args.schema, args.component)
+    else:
+        import yaml
+        with open(args.schema) as f:
+            schema = yaml.safe_load(f)
+
+    validator = compile_schema(schema)
+    stream = sys.stdin if args.configs == "-" else open(args.configs)
+    invalid = 0
+    with stream:
+        for line_no, _, issues in validate_jsonl(stream, validator):
+            if issues:
+                invalid += 1
+                print(json.dumps({"line": line_no, "errors": [issue._asdict() for issue in issues]}))
+    sys.exit(1 if invalid else 0)
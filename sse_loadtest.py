@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import subprocess
+import httpx
+
+# Load-test harness for alpha.py: starts an mcp_standin.py backend and the
+# proxy as separate uvicorn processes, holds N SSE connections open for a
+# fixed time, and reports delivered events/sec plus the proxy's CPU time per
+# connection (from the cpu_seconds field of its /metrics endpoint).
+
+def spawn(app: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env}
+    )
+
+async def wait_ready(client: httpx.AsyncClient, url: str, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            await client.get(url)
+            return
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+async def subscriber(client: httpx.AsyncClient, url: str, user_id: str, stop_at: float, counts: list, i: int):
+    in_event = False
+    async with client.stream("GET", url, headers={"x-user-id": user_id}) as response:
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                in_event = True
+            elif not line and in_event:
+                counts[i] += 1  # a blank line ends each event
+                in_event = False
+            if time.monotonic() >= stop_at:
+                break
+
+async def run(connections: int, duration: float, proxy_port: int, stream_key: str) -> dict:
+    proxy = f"http://localhost:{proxy_port}"
+    url = f"{proxy}/sse" + (f"?stream={stream_key}" if stream_key else "")
+    limits = httpx.Limits(max_connections=connections + 10)
+    async with httpx.AsyncClient(timeout=None, limits=limits) as client:
+        await wait_ready(client, f"{proxy}/metrics")
+        cpu_before = (await client.get(f"{proxy}/metrics")).json()["cpu_seconds"]
+
+        counts = [0] * connections
+        stop_at = time.monotonic() + duration
+        await asyncio.gather(*(
+            subscriber(client, url, f"user{i}", stop_at, counts, i) for i in range(connections)
+        ))
+
+        cpu_after = (await client.get(f"{proxy}/metrics")).json()["cpu_seconds"]
+
+    total = sum(counts)
+    cpu = cpu_after - cpu_before
+    return {
+        "connections": connections,
+        "events": total,
+        "events_per_sec": total / duration,
+        "events_per_sec_per_connection": total / duration / connections,
+        "proxy_cpu_seconds": cpu,
+        "proxy_cpu_ms_per_connection_second": cpu * 1000 / connections / duration,
+        "proxy_cpu_us_per_event": cpu * 1e6 / total if total else None
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the alpha.py SSE proxy against a local stand-in backend.")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.01, help="Stand-in seconds between events")
+    parser.add_argument("--lines", type=int, default=3, help="Data lines per stand-in event")
+    parser.add_argument("--stream", default="", help="Stream key (shared when the proxy runs with SSE_FANOUT=1)")
+    parser.add_argument("--backend-port", type=int, default=5101)
+    parser.add_argument("--proxy-port", type=int, default=8100)
+    args = parser.parse_args()
+
+    backend = spawn("mcp_standin:app", args.backend_port, {
+        "STANDIN_INTERVAL": str(args.interval),
+        "STANDIN_LINES": str(args.lines)
+    })
+    # Proxy settings (SSE_FANOUT, SSE_BATCH_WINDOW, ...) pass through from the environment
+    proxy = spawn("alpha:app", args.proxy_port, {
+        "MCP_BACKENDS": f"http://localhost:{args.backend_port}/sse"
+    })
+    try:
+        result = asyncio.run(run(args.connections, args.duration, args.proxy_port, args.stream))
+        print(json.dumps(result, indent=2))
+    finally:
+        for process in (proxy, backend):
+            process.terminate()
+            process.wait()
@@ -1,44 +1,362 @@
+import io
+import json
+import os
 import re
+import sys
+import mmap
+import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import emoji
 
+# Every junk metadata line in one alternation, anchored at the start like the
+# re.match calls it replaces; prefix-only patterns end in .* so $ can close it.
+# IGNORECASE is scoped to the metadata and day/time parts, as in the original
+# calls: under Unicode case folding the name class would also match letters
+# like "İ", "ſ" and the Kelvin sign, and drop real text.
+_DAYS = "Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday"
+_NAME = r"[A-Za-z ,.'-]+"  # Likely a name line like "Johnson, Jeff M"
+_DAY_TIME = rf"(?:{_DAYS})\s+\d{{1,2}}:\d{{2}}\s+[APMapm]{{2}}"  # Lines like "Friday 8:12 AM"
+_METADATA = (
+    r"(?P<reactions>\d+) Like reactions?\.?"
+    r"|(?P<reply>Reply)"
+    r"|See more"
+    r"|Open \d+ repl(?:y|ies) from.*"
+    r"|CC\b.*"
+)
+JUNK_LINE = re.compile(rf"(?:(?i:{_METADATA})|{_NAME}|(?i:{_DAY_TIME}))$")
+
+# The same pieces, split apart for the structured parser
+METADATA_LINE = re.compile(rf"(?:{_METADATA})$", re.IGNORECASE)
+NAME_LINE = re.compile(rf"{_NAME}$")
+TIMESTAMP_LINE = re.compile(rf"{_DAY_TIME}$", re.IGNORECASE)
+
+def _strip_emoji(line: str) -> str:
+    # No emoji is pure ASCII, so most lines skip the emoji scan entirely
+    return line if line.isascii() else emoji.replace_emoji(line, replace='')
+
+def iter_clean_lines(lines):
+    """Yield scrubbed lines from any iterable of text lines (file, stdin, iter_file_lines)."""
+    in_code_block = False
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # Single emoji pass: skip emoji-only lines, keep the stripped text otherwise
+        stripped = _strip_emoji(line)
+        if not stripped.strip():
+            continue
+
+        # Skip junk metadata
+        if JUNK_LINE.match(line):
+            continue
+
+        # Handle code block start
+        if '{' in line and not in_code_block:
+            in_code_block = True
+
+        yield stripped
+
+        # Handle code block end
+        if '}' in stripped and in_code_block:
+            in_code_block = False
+
 def clean_teams_chat_fully_scrubbed(input_text: str) -> str:
+    return '\n'.join(iter_clean_lines(io.StringIO(input_text)))
+
+# ---- Streaming files ----
+CHUNK_LINES = 10000  # cleaned lines buffered per write
+
+def iter_file_lines(path: str, use_mmap: bool = False):
+    """Lines of a UTF-8 export, read lazily from the file or through a memory map."""
+    if not use_mmap:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            yield from f
+        return
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for raw in iter(mm.readline, b""):
+                yield raw.decode("utf-8", errors="replace")
+
+def write_clean_lines(lines, out, chunk_lines: int = CHUNK_LINES) -> int:
+    """Scrub `lines` into the text stream `out` in chunks; returns lines written."""
+    written = 0
+    chunk = []
+    for line in iter_clean_lines(lines):
+        chunk.append(line + "\n")
+        if len(chunk) >= chunk_lines:
+            out.writelines(chunk)
+            written += len(chunk)
+            chunk.clear()
+    out.writelines(chunk)
+    return written + len(chunk)
+
+def _writer(fmt: str):
+    return write_messages_jsonl if fmt == "jsonl" else write_clean_lines
+
+def clean_file(src: str, dst: str, use_mmap: bool = False, chunk_lines: int = CHUNK_LINES,
+               fmt: str = "text") -> tuple:
+    with open(dst, "w", encoding="utf-8") as out:
+        written = _writer(fmt)(iter_file_lines(src, use_mmap), out, chunk_lines)
+    return src, written
+
+def clean_directory(src_dir: str, dst_dir: str, workers: int = None, use_mmap: bool = False,
+                    chunk_lines: int = CHUNK_LINES, fmt: str = "text"):
+    """Clean every file under src_dir into the same relative path under dst_dir, one file per worker task.
+
+    With fmt="jsonl" each output gets a .jsonl extension.
+    """
+    jobs = []
+    for root, _, files in os.walk(src_dir):
+        for name in sorted(files):
+            src = os.path.join(root, name)
+            dst = os.path.join(dst_dir, os.path.relpath(src, src_dir))
+            if fmt == "jsonl":
+                dst = os.path.splitext(dst)[0] + ".jsonl"
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            jobs.append((src, dst))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(clean_file, src, dst, use_mmap, chunk_lines, fmt) for src, dst in jobs]
+        for future in as_completed(futures):
+            yield future.result()
+
+# ---- Structured messages ----
+def _new_message(msg_id: int, author, timestamp, thread) -> dict:
+    return {
+        "id": msg_id,
+        "author": author,
+        "timestamp": timestamp,
+        "body": [],
+        "is_code": False,
+        "reactions": 0,
+        "reply_to": thread if thread != msg_id else None,
+        "thread": thread,
+    }
+
+def _finish_message(message: dict) -> dict:
+    message["body"] = "\n".join(message["body"])
+    return message
+
+def iter_messages(lines):
+    """Yield one record per chat message from any iterable of export lines.
+
+    A name line directly followed by a day-time line starts a message; every
+    message up to the next "Reply" marker belongs to the thread opened by the
+    first one. Body lines keep their text (emoji stripped) instead of being
+    dropped, and is_code is set from brace depth rather than a single flag.
+    """
+    next_id = 1
+    thread = None
+    message = None
+    author = None  # a name line waiting to see whether a timestamp follows
+    depth = 0
+
+    for raw in lines:
+        # Metadata, name and timestamp checks see the stripped line; code keeps its indentation
+        raw = raw.rstrip()
+        line = raw.strip()
+        if not line:
+            continue
+
+        if author is not None:
+            if TIMESTAMP_LINE.match(line):
+                if message is not None:
+                    yield _finish_message(message)
+                if thread is None:
+                    thread = next_id
+                message = _new_message(next_id, author, line, thread)
+                next_id += 1
+                author = None
+                depth = 0
+                continue
+            # No timestamp after it, so the name line was body text after all
+            pending, author = author, None
+            if message is None:
+                message = _new_message(next_id, None, None, thread or next_id)
+                thread = message["thread"]
+                next_id += 1
+            message["body"].append(pending)
+
+        metadata = METADATA_LINE.match(line)
+        if metadata:
+            if metadata.group("reactions") and message is not None:
+                message["reactions"] = int(metadata.group("reactions"))
+            elif metadata.group("reply"):
+                # End of a thread: flush now so the record streams out promptly
+                if message is not None:
+                    yield _finish_message(message)
+                message = None
+                thread = None
+                depth = 0
+            continue
+
+        if depth == 0:
+            if NAME_LINE.match(line):
+                author = line
+                continue
+            if TIMESTAMP_LINE.match(line):
+                continue
+
+        opens, closes = line.count("{") + line.count("["), line.count("}") + line.count("]")
+        is_code = depth > 0 or opens > closes
+        stripped = _strip_emoji(raw).rstrip() if is_code else _strip_emoji(line).strip()
+        if not stripped.strip():
+            continue
+
+        if message is None:
+            message = _new_message(next_id, None, None, thread or next_id)
+            thread = message["thread"]
+            next_id += 1
+
+        if is_code:
+            message["is_code"] = True
+        depth = max(0, depth + opens - closes)
+        message["body"].append(stripped)
+
+    if author is not None:
+        if message is None:
+            message = _new_message(next_id, None, None, thread or next_id)
+        message["body"].append(author)
+    if message is not None:
+        yield _finish_message(message)
+
+def write_messages_jsonl(lines, out, chunk_lines: int = CHUNK_LINES) -> int:
+    """Parse `lines` into JSONL message records on `out` in chunks; returns records written."""
+    written = 0
+    chunk = []
+    for message in iter_messages(lines):
+        chunk.append(json.dumps(message, ensure_ascii=False) + "\n")
+        if len(chunk) >= chunk_lines:
+            out.writelines(chunk)
+            written += len(chunk)
+            chunk.clear()
+    out.writelines(chunk)
+    return written + len(chunk)
+
+# ---- Benchmark ----
+def _clean_teams_chat_legacy(input_text: str) -> str:
+    # The original per-line implementation, kept as the benchmark baseline
     cleaned_lines = []
     lines = input_text.split('\n')
     in_code_block = False
-
-    # Match lines like: Friday 8:22 AM or Monday 11:45 PM
     day_time_pattern = re.compile(r'^(Monday|Tuesday|Wednesday|Thursday|Friday|Saturday|Sunday)\s+\d{1,2}:\d{2}\s+[APMapm]{2}$', re.IGNORECASE)
 
     for line in lines:
         line = line.strip()
-
-        # Skip empty lines or emoji-only lines
         if not line or emoji.replace_emoji(line, replace='').strip() == '':
             continue
-
-        # Skip junk metadata
         if any([
             re.match(r'^\d+ Like reaction(s)?\.?$', line, re.IGNORECASE),
             re.match(r'^Reply$', line, re.IGNORECASE),
             re.match(r'^See more$', line, re.IGNORECASE),
             re.match(r'^Open \d+ repl(y|ies) from', line, re.IGNORECASE),
             re.match(r'^CC\b.*', line, re.IGNORECASE),
-            re.match(r'^[A-Za-z ,.\'-]+$', line),  # Likely a name line like "Johnson, Jeff M"
-            day_time_pattern.match(line)           # Skip lines like "Friday 8:12 AM"
+            re.match(r'^[A-Za-z ,.\'-]+$', line),
+            day_time_pattern.match(line)
         ]):
             continue
-
-        # Handle code block start
         if '{' in line and not in_code_block:
             in_code_block = True
-
-        # Remove emojis from the message
         line = emoji.replace_emoji(line, replace='')
-
         cleaned_lines.append(line)
-
-        # Handle code block end
         if '}' in line and in_code_block:
             in_code_block = False
 
-    return '\n'.join(cleaned_lines)
\ No newline at end of file
+    return '\n'.join(cleaned_lines)
+
+def synthetic_export(messages: int, seed: int = 0) -> str:
+    """A Teams-like export: authors, timestamps, text, code, reactions and reply markers."""
+    rng = random.Random(seed)
+    names = ["Johnson, Jeff M", "Patel, Priya", "Nguyen, An", "O'Brien, Kate"]
+    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+    bodies = [
+        "Can someone check the deploy for service-42? It failed at 10:03.",
+        "PR #1234 is ready for review 🙏",
+        "Thanks, merged 👍",
+        "Rollback done, error rate back to 0.2%",
+        "See ticket CHG0012345 for details: https://example.com/chg/12345",
+        # Letters that case-fold into [A-Za-z]; these lines are text, not names
+        "İstanbul",
+        "Straſe",
+        "\u212aelvin",
+    ]
+    code = ['config = {', '  "retries": 3,', '  "timeout": 30', '}']
+
+    out = []
+    for _ in range(messages):
+        out.append(rng.choice(names))
+        out.append(f"{rng.choice(days)} {rng.randint(1, 12)}:{rng.randint(0, 59):02d} {rng.choice(['AM', 'PM'])}")
+        out.extend(rng.choice(bodies) for _ in range(rng.randint(1, 3)))
+        roll = rng.random()
+        if roll < 0.1:
+            out.extend(code)
+        elif roll < 0.3:
+            out.append("🎉")
+        if rng.random() < 0.4:
+            out.append(f"{rng.randint(1, 9)} Like reactions.")
+        if rng.random() < 0.2:
+            out.append(f"Open {rng.randint(2, 9)} replies from {rng.choice(names)}")
+        out.extend(["Reply", ""])
+    return "\n".join(out)
+
+def benchmark(messages: int = 20000, repeat: int = 3) -> dict:
+    export = synthetic_export(messages)
+    line_count = export.count("\n") + 1
+    results = {"lines": line_count}
+    for label, clean in (("legacy", _clean_teams_chat_legacy), ("current", clean_teams_chat_fully_scrubbed)):
+        best = min(_timed(clean, export) for _ in range(repeat))
+        results[label] = line_count / best
+    results["speedup"] = results["current"] / results["legacy"]
+    results["identical_output"] = _clean_teams_chat_legacy(export) == clean_teams_chat_fully_scrubbed(export)
+    return results
+
+def _timed(clean, export: str) -> float:
+    start = time.perf_counter()
+    clean(export)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Scrub Teams chat exports.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    bench = commands.add_parser("bench", help="Compare lines/sec against the original implementation")
+    bench.add_argument("--messages", type=int, default=20000, help="Messages in the synthetic export")
+    bench.add_argument("--repeat", type=int, default=3)
+    clean = commands.add_parser("clean", help="Scrub an export file, stdin, or a directory of exports")
+    clean.add_argument("input", help="Export file, directory, or '-' for stdin")
+    clean.add_argument("-o", "--output", default="-", help="Output file ('-' for stdout), or directory when input is one")
+    clean.add_argument("--workers", type=int, default=None, help="Processes for directory input (default: CPU count)")
+    clean.add_argument("--mmap", action="store_true", help="Read input files through a memory map")
+    clean.add_argument("--chunk-lines", type=int, default=CHUNK_LINES, help="Cleaned lines buffered per write")
+    clean.add_argument("--format", choices=["text", "jsonl"], default="text",
+                       help="text: scrubbed lines; jsonl: one message record per line")
+    args = parser.parse_args()
+
+    if args.command == "clean":
+        if os.path.isdir(args.input):
+            if args.output == "-":
+                parser.error("directory input needs --output DIR")
+            for src, written in clean_directory(args.input, args.output, args.workers, args.mmap,
+                                                args.chunk_lines, args.format):
+                print(f"{src}: {written} {'messages' if args.format == 'jsonl' else 'lines'}", file=sys.stderr)
+        else:
+            lines = sys.stdin if args.input == "-" else iter_file_lines(args.input, args.mmap)
+            write = _writer(args.format)
+            if args.output == "-":
+                write(lines, sys.stdout, args.chunk_lines)
+            else:
+                with open(args.output, "w", encoding="utf-8") as out:
+                    write(lines, out, args.chunk_lines)
+
+    if args.command == "bench":
+        result = benchmark(args.messages, args.repeat)
+        print(f"{result['lines']} lines")
+        print(f"legacy:  {result['legacy']:12,.0f} lines/sec")
+        print(f"current: {result['current']:12,.0f} lines/sec ({result['speedup']:.1f}x)")
+        print(f"identical output: {result['identical_output']}")
+        sys.exit(0 if result["identical_output"] else 1)
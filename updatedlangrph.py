@@ -1,9 +1,19 @@
 import os
+import sys
 import json
+import time
 import yaml
+import asyncio
+import hashlib
+import sqlite3
+import argparse
+import threading
+from collections import OrderedDict, Counter
+from multiprocessing import Pool
 from typing import TypedDict, Optional
 from langgraph.graph import StateGraph, END
 from openai import AzureOpenAI
+from schemavalidator import ValidationError, compile_schema, validator_for
 
 # ---- Azure OpenAI Setup ----
 client = AzureOpenAI(
@@ -55,6 +65,7 @@ schema = {
 class ConfigState(TypedDict):
     config: dict
     current_field: Optional[list]  # path like ['database', 'host']
+    cursor: int  # index into compiled_schema.leaves
 
 # ---- Schema Helpers ----
 def get_schema_at_path(schema_node, path):
@@ -103,9 +114,69 @@ def find_next_field(schema_node, config_node, path=None):
 
     return None
 
+# ---- Compiled Schema ----
+class CompiledSchema:
+    """Flattened view of a nested schema, built once per schema.
+
+    `fields` maps every path tuple to its meta, and `leaves` lists the paths
+    find_next_field can stop at (arrays and required scalars) in schema order.
+    """
+
+    def __init__(self, schema_node):
+        self.root = schema_node
+        self.fields = {}
+        self.leaves = []
+        self._compile(schema_node, ())
+
+    def _compile(self, schema_node, prefix):
+        for key, meta in schema_node.items():
+            path = prefix + (key,)
+            self.fields[path] = meta
+            if meta["type"] == "object":
+                self._compile(meta.get("properties", {}), path)
+            elif meta["type"] == "array" or meta.get("required", False):
+                self.leaves.append(path)
+
+    def get(self, path):
+        meta = self.fields.get(tuple(path))
+        if meta is None:
+            # Paths into array items are not flattened
+            return get_schema_at_path(self.root, path)
+        return meta
+
+    def is_missing(self, config, path):
+        node = config
+        for key in path[:-1]:
+            node = node.get(key, {})
+        value = node.get(path[-1])
+        if self.fields[path]["type"] == "array":
+            return not value
+        return value is None
+
+    def next_missing(self, config, cursor=0):
+        """Return (path, cursor) for the first missing leaf at or after cursor.
+
+        Filled paths are only ever added, so callers keep the returned cursor
+        and the next lookup resumes there instead of rescanning the schema.
+        """
+        while cursor < len(self.leaves):
+            path = self.leaves[cursor]
+            if self.is_missing(config, path):
+                return list(path), cursor
+            cursor += 1
+        return None, cursor
+
+    def missing_paths(self, config, cursor=0):
+        """All leaves at or after cursor that are still missing, in ask order."""
+        return [list(path) for path in self.leaves[cursor:] if self.is_missing(config, path)]
+
+compiled_schema = CompiledSchema(schema)
+config_validator = compile_schema(schema)
+
 def pick_next_field(state: ConfigState) -> ConfigState:
-    path = find_next_field(schema, state["config"])
+    path, cursor = compiled_schema.next_missing(state["config"], state.get("cursor", 0))
     state["current_field"] = path
+    state["cursor"] = cursor
     return state
 
 # ---- Prompting ----
@@ -113,15 +184,15 @@ def ask_field(state: ConfigState) -> str:
     path = state["current_field"]
     if not path:
         return "__COMPLETE__"
-    meta = get_schema_at_path(schema, path)
+    meta = compiled_schema.get(path)
     label = ".".join(path)
     if "enum" in meta:
         return f"{label} - {meta['description']} Choose one: {', '.join(meta['enum'])}"
     return f"{label} - {meta['description']} ({meta['type']})"
 
 # ---- LLM Suggestion ----
-def get_llm_suggestion(path: list) -> str:
-    meta = get_schema_at_path(schema, path)
+def build_suggestion_messages(path: list) -> list:
+    meta = compiled_schema.get(path)
     field = ".".join(path)
     suggestions = meta.get("suggestions", [])
     enum_values = meta.get("enum", [])
@@ -134,45 +205,284 @@ def get_llm_suggestion(path: list) -> str:
     else:
         suggestion_text = ""
 
-    messages = [
+    return [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": f"Suggest a value for '{field}'. Description: {meta['description']}. {suggestion_text}. Only return the value."}
     ]
 
-    response = client.chat.completions.create(
+def get_llm_suggestion(path: list, llm_client=None, cache=None) -> str:
+    cache = cache or suggestion_cache
+    messages = build_suggestion_messages(path)
+    field = ".".join(path)
+    key = SuggestionCache.make_key(deployment_name, messages)
+    meta_hash = SuggestionCache.meta_hash(compiled_schema.get(path))
+
+    cached = cache.get(key, field, meta_hash)
+    if cached is not None:
+        return cached
+
+    response = (llm_client or client).chat.completions.create(
         model=deployment_name,
         messages=messages,
         temperature=0
     )
 
-    return response.choices[0].message.content.strip()
+    suggestion = response.choices[0].message.content.strip()
+    cache.put(key, field, meta_hash, suggestion)
+    return suggestion
+
+# ---- Suggestion Cache ----
+class SuggestionCache:
+    """LRU cache of LLM suggestions with TTL and an optional SQLite store.
+
+    Entries are keyed on a hash of the deployment name and rendered messages.
+    Each entry also records a hash of the field's schema meta; when the meta
+    for a path changes, every cached suggestion for that path is dropped.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 7 * 24 * 3600,
+                 db_path: Optional[str] = None, max_disk_entries: int = 100_000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, created, path)
+        self._meta_hashes = {}  # path -> meta hash seen this session
+        self._lock = threading.Lock()
+        self._db = None
+        self._db_pid = None
+        self._puts = 0
+
+    @staticmethod
+    def make_key(model: str, messages: list) -> str:
+        payload = json.dumps({"model": model, "messages": messages}, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def meta_hash(meta: dict) -> str:
+        return hashlib.sha256(json.dumps(meta, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _conn(self):
+        if not self.db_path:
+            return None
+        # Reopen after fork; SQLite connections must not cross processes
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db_pid = os.getpid()
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS suggestions "
+                "(key TEXT PRIMARY KEY, path TEXT, meta_hash TEXT, value TEXT, created REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS suggestions_path ON suggestions (path)")
+            self._db.commit()
+        return self._db
+
+    def _check_meta(self, path: str, meta_hash: str):
+        if self._meta_hashes.get(path) == meta_hash:
+            return
+        if path in self._meta_hashes:
+            for key in [k for k, entry in self._entries.items() if entry[2] == path]:
+                del self._entries[key]
+        db = self._conn()
+        if db is not None:
+            db.execute("DELETE FROM suggestions WHERE path = ? AND meta_hash != ?", (path, meta_hash))
+            db.commit()
+        self._meta_hashes[path] = meta_hash
+
+    def _remember(self, key: str, value: str, created: float, path: str):
+        self._entries[key] = (value, created, path)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str, path: str, meta_hash: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            self._check_meta(path, meta_hash)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[1] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self._entries[key]
+
+            db = self._conn()
+            if db is not None:
+                row = db.execute("SELECT value, created FROM suggestions WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    self._remember(key, row[0], row[1], path)
+                    self.hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, path: str, meta_hash: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._check_meta(path, meta_hash)
+            self._remember(key, value, now, path)
+
+            db = self._conn()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO suggestions (key, path, meta_hash, value, created) VALUES (?, ?, ?, ?, ?)",
+                    (key, path, meta_hash, value, now)
+                )
+                self._puts += 1
+                if self._puts % 256 == 0:
+                    self._prune(db, now)
+                db.commit()
+
+    def _prune(self, db, now: float):
+        db.execute("DELETE FROM suggestions WHERE created < ?", (now - self.ttl,))
+        db.execute(
+            "DELETE FROM suggestions WHERE key IN "
+            "(SELECT key FROM suggestions ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,)
+        )
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+suggestion_cache = SuggestionCache(
+    max_entries=int(os.getenv("SUGGESTION_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("SUGGESTION_CACHE_TTL", str(7 * 24 * 3600))),
+    db_path=os.getenv("SUGGESTION_CACHE_DB")
+)
+
+# ---- Suggestion Resolvers ----
+class SuggestionHistory:
+    """Per-path counts of values the user accepted, optionally kept in a JSON file."""
+
+    def __init__(self, file_path: Optional[str] = None):
+        self.file_path = file_path
+        self.counts = {}  # "database.host" -> Counter of accepted inputs
+        if file_path and os.path.exists(file_path):
+            with open(file_path) as f:
+                self.counts = {path: Counter(values) for path, values in json.load(f).items()}
+
+    def record(self, path: list, value: str):
+        self.counts.setdefault(".".join(path), Counter())[value] += 1
+
+    def ranked(self, path: list) -> list:
+        counts = self.counts.get(".".join(path))
+        return [value for value, _ in counts.most_common()] if counts else []
+
+    def save(self):
+        if self.file_path:
+            with open(self.file_path, "w") as f:
+                json.dump(self.counts, f)
+
+suggestion_history = SuggestionHistory(os.getenv("SUGGESTION_HISTORY_FILE"))
+
+def _as_input(value) -> str:
+    # Resolvers return text the way a user would type it, for parse_input
+    if isinstance(value, list):
+        return ", ".join(str(v) for v in value)
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+def resolve_default(path: list, meta: dict) -> Optional[str]:
+    return _as_input(meta["default"]) if "default" in meta else None
+
+def resolve_single_choice(path: list, meta: dict) -> Optional[str]:
+    choices = meta.get("suggestions") or meta.get("enum") or []
+    return choices[0] if len(choices) == 1 else None
+
+def resolve_history(path: list, meta: dict) -> Optional[str]:
+    choices = meta.get("suggestions") or meta.get("enum")
+    for value in suggestion_history.ranked(path):
+        if not choices or value in choices:
+            return value
+    return None
+
+def resolve_first_choice(path: list, meta: dict) -> Optional[str]:
+    # The LLM prompt only asks the model to pick from this list anyway
+    choices = meta.get("suggestions") or meta.get("enum")
+    return choices[0] if choices else None
+
+# Tried in order; the first non-None answer wins. The LLM is the fallback.
+suggestion_resolvers = [resolve_default, resolve_single_choice, resolve_history, resolve_first_choice]
+
+def resolve_locally(path: list) -> Optional[str]:
+    meta = compiled_schema.get(path)
+    for resolver in suggestion_resolvers:
+        suggestion = resolver(path, meta)
+        if suggestion is not None:
+            return suggestion
+    return None
+
+def suggest_value(path: list, llm=None) -> str:
+    """Resolve a suggestion locally, falling back to `llm(path)` (get_llm_suggestion by default)."""
+    suggestion = resolve_locally(path)
+    if suggestion is not None:
+        return suggestion
+    return (llm or get_llm_suggestion)(path)
+
+# ---- Suggestion Prefetch ----
+class SuggestionPrefetcher:
+    """Fetches suggestions for many fields concurrently ahead of the prompt loop.
+
+    Requests run on a private event loop in a background thread, at most
+    `max_concurrency` at a time, so the synchronous agent loop can call
+    prefetch() as soon as the missing paths are known and get() later.
+    Any object with a `chat.completions.create` method works as `llm_client`.
+    """
+
+    def __init__(self, llm_client=None, max_concurrency: int = 8):
+        self.llm_client = llm_client or client
+        self._futures = {}
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+
+    async def _fetch(self, path: list) -> str:
+        async with self._semaphore:
+            return await asyncio.to_thread(get_llm_suggestion, path, self.llm_client)
+
+    def prefetch(self, paths):
+        for path in paths:
+            key = tuple(path)
+            if key not in self._futures:
+                self._futures[key] = asyncio.run_coroutine_threadsafe(self._fetch(list(path)), self._loop)
+
+    def get(self, path: list, timeout: Optional[float] = None) -> str:
+        """Return the prefetched suggestion, fetching it now if it was never queued."""
+        future = self._futures.get(tuple(path))
+        if future is None:
+            return get_llm_suggestion(path, self.llm_client)
+        return future.result(timeout)
+
+    def close(self):
+        for future in self._futures.values():
+            future.cancel()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
 
 # ---- Input Parsing ----
 def parse_input(user_input: str, meta: dict) -> Optional[any]:
     try:
-        if "enum" in meta:
-            if user_input not in meta["enum"]:
-                raise ValueError("Invalid enum choice")
-            return user_input
-        elif meta["type"] == "string":
-            return user_input
-        elif meta["type"] == "integer":
-            return int(user_input)
-        elif meta["type"] == "boolean":
-            return user_input.lower() in ["true", "yes", "1"]
-        elif meta["type"] == "array":
-            return [i.strip() for i in user_input.split(",")]
-    except:
+        return validator_for(meta).coerce(user_input)
+    except ValidationError:
         return None
 
 # ---- Store Response ----
 def store_response(state: ConfigState, user_input: str) -> ConfigState:
     path = state["current_field"]
-    meta = get_schema_at_path(schema, path)
+    meta = compiled_schema.get(path)
     value = parse_input(user_input, meta)
 
     if value is not None:
         set_nested_value(state["config"], path, value)
+        suggestion_history.record(path, user_input)
     else:
         print(f"❌ Invalid input for {'.'.join(path)}. Try again.")
 
@@ -205,10 +515,16 @@ graph = builder.compile()
 def run_agent(partial_config: Optional[dict] = None):
     state: ConfigState = {
         "config": partial_config if partial_config else {},
-        "current_field": None
+        "current_field": None,
+        "cursor": 0
     }
 
     print("🛠️  Let's build your config. Type 'suggest' to get a value from AI.\n")
+    prefetcher = SuggestionPrefetcher()
+    prefetcher.prefetch(
+        path for path in compiled_schema.missing_paths(state["config"])
+        if resolve_locally(path) is None
+    )
 
     while True:
         state = graph.invoke(state)
@@ -220,7 +536,7 @@ def run_agent(partial_config: Optional[dict] = None):
         user_input = input(f"> {prompt}\n> ").strip()
 
         if user_input.lower() == "suggest":
-            suggestion = get_llm_suggestion(path)
+            suggestion = suggest_value(path, llm=prefetcher.get)
             print(f"🤖 Suggested: {suggestion}")
             confirm = input("Use this? [Y/n]: ").strip().lower()
             if confirm in ["", "y", "yes"]:
@@ -231,9 +547,154 @@ def run_agent(partial_config: Optional[dict] = None):
 
         state = store_response(state, user_input)
 
+    prefetcher.close()
+    suggestion_history.save()
     state = apply_defaults(state)
     output_config(state["config"])
 
+# ---- Batch Mode ----
+def _read_config_file(file_path: str):
+    with open(file_path) as f:
+        if file_path.endswith(".json"):
+            return json.load(f)
+        return yaml.safe_load(f) or {}
+
+def iter_partial_configs(source: str):
+    """Yield (record_id, partial_config, error) from JSONL (file or '-') or a directory of JSON/YAML files.
+
+    A record that can't be read or isn't a mapping comes back as (record_id, None, message).
+    """
+    def checked(record_id, config):
+        if not isinstance(config, dict):
+            return record_id, None, f"expected a mapping, got {type(config).__name__}"
+        return record_id, config, None
+
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if not name.endswith((".json", ".yaml", ".yml")):
+                continue
+            try:
+                config = _read_config_file(os.path.join(source, name))
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                yield name, None, f"{type(e).__name__}: {e}"
+                continue
+            yield checked(name, config)
+        return
+
+    f = sys.stdin if source == "-" else open(source)
+    try:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record_id = f"{source}:{line_no}"
+            try:
+                config = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield record_id, None, f"invalid JSON: {e}"
+                continue
+            yield checked(record_id, config)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+_batch_prefetcher = None
+
+def _needs_llm(path: list) -> bool:
+    return compiled_schema.get(path).get("required", False) and resolve_locally(path) is None
+
+def headless_value(path: list, use_llm: bool = False):
+    """Value to fill in without a user: default, then the resolver chain, then the LLM."""
+    meta = compiled_schema.get(path)
+    if "default" in meta:
+        return meta["default"]
+    if not meta.get("required", False):
+        return None
+    suggestion = resolve_locally(path)
+    if suggestion is None and use_llm:
+        suggestion = _batch_prefetcher.get(path)
+    return parse_input(suggestion, meta) if suggestion is not None else None
+
+def fill_config_headless(partial_config: Optional[dict], use_llm: bool = False) -> dict:
+    state: ConfigState = {
+        "config": partial_config if partial_config else {},
+        "current_field": None,
+        "cursor": 0
+    }
+    missing = []
+    assumed = []  # required fields filled from a suggestion, history or the LLM rather than a default
+
+    global _batch_prefetcher
+    if use_llm:
+        if _batch_prefetcher is None:
+            _batch_prefetcher = SuggestionPrefetcher()
+        _batch_prefetcher.prefetch(
+            path for path in compiled_schema.missing_paths(state["config"])
+            if _needs_llm(path)
+        )
+
+    while True:
+        state = graph.invoke(state)
+        path = state["current_field"]
+        if not path:
+            break
+
+        value = headless_value(path, use_llm)
+        if value is not None:
+            set_nested_value(state["config"], path, value)
+            if "default" not in compiled_schema.get(path):
+                assumed.append(".".join(path))
+        else:
+            if compiled_schema.get(path).get("required", False):
+                missing.append(".".join(path))
+            state["cursor"] += 1  # leave it unfilled and move on
+
+    state = apply_defaults(state)
+    coerced, issues = config_validator(state["config"])
+    if coerced is not None:
+        state["config"] = coerced
+    errors = [issue._asdict() for issue in issues if issue.path not in missing]
+    return {"config": state["config"], "missing": missing, "assumed": assumed, "errors": errors}
+
+def _fill_record(args):
+    record_id, partial_config, error, use_llm = args
+    if error is None:
+        try:
+            result = fill_config_headless(partial_config, use_llm)
+        except Exception as e:  # one bad record must not take down the batch
+            error = f"{type(e).__name__}: {e}"
+    if error is not None:
+        return {"id": record_id, "status": "error", "error": error}
+    complete = not result["missing"] and not result["errors"]
+    return {"id": record_id, "status": "complete" if complete else "incomplete", "complete": complete, **result}
+
+def run_batch(source: str, output: str = "-", workers: Optional[int] = None, use_llm: bool = False) -> dict:
+    """Fill every partial config from `source` across a process pool, writing JSONL reports."""
+    tasks = ((record_id, config, error, use_llm) for record_id, config, error in iter_partial_configs(source))
+    summary = {"records": 0, "complete": 0, "incomplete": 0, "error": 0}
+
+    out = sys.stdout if output == "-" else open(output, "w")
+    try:
+        with Pool(processes=workers) as pool:
+            for report in pool.imap(_fill_record, tasks, chunksize=16):
+                out.write(json.dumps(report) + "\n")
+                summary["records"] += 1
+                summary[report["status"]] += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return summary
+
 # ---- Run It ----
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fill configs against the schema.")
+    parser.add_argument("--batch", metavar="SOURCE", help="JSONL file ('-' for stdin) or directory of JSON/YAML configs")
+    parser.add_argument("--output", default="-", help="JSONL report path (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--llm", action="store_true", help="Ask the LLM for required fields with no default or suggestions")
+    args = parser.parse_args()
+
+    if args.batch:
+        summary = run_batch(args.batch, args.output, args.workers, args.llm)
+        print(json.dumps(summary), file=sys.stderr)
+        sys.exit(0 if summary["incomplete"] == 0 and summary["error"] == 0 else 1)
     run_agent()
\ No newline at end of file